@@ -20,12 +20,15 @@ from gi.repository import Gst, GstRtspServer, GLib
 
 import serial
 import threading
+import os
+import select
 import time
 import logging
 import signal
 import sys
 import socket
 import queue
+import re
 from datetime import datetime
 from typing import Optional
 from enum import IntEnum
@@ -48,10 +51,26 @@ WIDTH, HEIGHT, FPS = 640, 480, 15
 RTSP_PORT = 8554
 RTSP_PATH = "/elevator"
 
+# テキストサイズキャッシュ上限
+BBOX_CACHE_SIZE = 100
+
 # スレッド間通信設定
 MESSAGE_QUEUE_SIZE = 1000  # メッセージキューサイズ
 SERIAL_BUFFER_SIZE = 4096  # シリアルバッファサイズ
 
+# HEX文字 → 値 変換テーブル（不正文字は0xFF）
+HEX_NIBBLE = bytes(
+    (b - 48) if 48 <= b <= 57 else
+    (b - 55) if 65 <= b <= 70 else
+    (b - 87) if 97 <= b <= 102 else 0xFF
+    for b in range(256)
+)
+
+# ENQメッセージ形式（ENQ + 局番号4桁 + 'W' + データ番号/値HEX8桁 + チェックサム2桁）
+# 走査・検証は正規表現エンジン（C実装）で一括実行
+ENQ_MESSAGE_PATTERN = re.compile(rb'\x05[0-9]{4}W[0-9A-Fa-f]{8}..', re.DOTALL)
+ENQ_MESSAGE_LENGTH = 16
+
 # ── ログ設定 ─────────────────────────────────
 logging.basicConfig(
     level=logging.INFO,
@@ -73,7 +92,7 @@ class ElevatorState:
         self.target_floor = None
         self.load_weight = 0
         self.is_moving = False
-        self.last_update = datetime.now()
+        self.last_update = time.time()  # UNIXタイムスタンプ（表示時に整形）
         self.communication_log = []
         self.max_log_entries = 10
         self.connection_status = "切断中"
@@ -91,7 +110,7 @@ class ElevatorState:
         with self._lock:
             old_floor = self.current_floor
             self.current_floor = floor_str
-            self.last_update = datetime.now()
+            self.last_update = time.time()
             
             if old_floor != floor_str:
                 logger.info(f"🏢 現在階変更: {old_floor} → {floor_str}")
@@ -136,14 +155,14 @@ class ElevatorState:
                         self.arrival_detected = True
                         self.last_arrival_time = datetime.now()
             
-            self.last_update = datetime.now()
+            self.last_update = time.time()
 
     def update_load(self, weight: int):
         """荷重更新（スレッドセーフ）"""
         with self._lock:
             old_weight = self.load_weight
             self.load_weight = weight
-            self.last_update = datetime.now()
+            self.last_update = time.time()
             
             if old_weight != weight:
                 logger.info(f"⚖️ 荷重変更: {old_weight}kg → {weight}kg")
@@ -228,6 +247,27 @@ class ElevatorRTSPFactory(GstRtspServer.RTSPMediaFactory):
         self.set_shared(True)
         self._frame_thread = None
         self._frame_running = False
+        # appsrc の need-data / enough-data で生成を制御
+        self._producing = threading.Event()
+        # グリフアトラス（(フォントID, 文字) → (マスク, 左, 上, 下, 送り幅)）
+        self._glyph_cache = {}
+        # 固定文字列のテキストサイズキャッシュ（(文字列, フォントID) → (幅, 高さ)）
+        self._bbox_cache = {}
+        
+        # エンコーダー選択（Raspberry Pi のハードウェアエンコーダーを優先）
+        if Gst.ElementFactory.find('v4l2h264enc'):
+            encoder_str = (
+                f' ! video/x-raw,format=NV12,width={WIDTH},height={HEIGHT},framerate={FPS}/1 '
+                ' ! v4l2h264enc extra-controls="controls,h264_profile=1,video_bitrate=800000" '
+                ' ! video/x-h264,level=(string)4 ! h264parse '
+            )
+            logger.info("🎞️ エンコーダー: v4l2h264enc（ハードウェア）")
+        else:
+            encoder_str = (
+                f' ! video/x-raw,format=I420,width={WIDTH},height={HEIGHT},framerate={FPS}/1 '
+                ' ! x264enc tune=zerolatency bitrate=800 speed-preset=ultrafast '
+            )
+            logger.info("🎞️ エンコーダー: x264enc（ソフトウェア）")
         
         # GStreamerパイプライン設定
         self.launch_str = (
@@ -235,8 +275,7 @@ class ElevatorRTSPFactory(GstRtspServer.RTSPMediaFactory):
             f' caps=video/x-raw,format=RGB,width={WIDTH},height={HEIGHT},framerate={FPS}/1 '
             ' do-timestamp=true '
             ' ! videoconvert '
-            f' ! video/x-raw,format=I420,width={WIDTH},height={HEIGHT},framerate={FPS}/1 '
-            ' ! x264enc tune=zerolatency bitrate=800 speed-preset=ultrafast '
+            f'{encoder_str}'
             ' ! rtph264pay name=pay0 pt=96 config-interval=1 )'
         )
 
@@ -244,6 +283,10 @@ class ElevatorRTSPFactory(GstRtspServer.RTSPMediaFactory):
         """パイプライン要素作成"""
         pipeline = Gst.parse_launch(self.launch_str)
         self.appsrc = pipeline.get_by_name('src')
+        self.appsrc.set_property('format', Gst.Format.TIME)
+        self.appsrc.set_property('max-bytes', WIDTH * HEIGHT * 3 * 2)
+        self.appsrc.connect('need-data', self._on_need_data)
+        self.appsrc.connect('enough-data', self._on_enough_data)
         
         # フレーム生成スレッドを開始
         if not self._frame_running:
@@ -258,6 +301,14 @@ class ElevatorRTSPFactory(GstRtspServer.RTSPMediaFactory):
         
         return pipeline
 
+    def _on_need_data(self, src, length):
+        """appsrc がデータを要求（生成再開）"""
+        self._producing.set()
+
+    def _on_enough_data(self, src):
+        """appsrc のキューが満杯（生成一時停止）"""
+        self._producing.clear()
+
     def push_frames(self):
         """フレーム生成・配信（専用スレッド）"""
         logger.info("🎬 RTSP フレーム生成開始")
@@ -286,12 +337,23 @@ class ElevatorRTSPFactory(GstRtspServer.RTSPMediaFactory):
             font_large = ImageFont.load_default()
             font_medium = ImageFont.load_default()
             font_small = ImageFont.load_default()
+        
+        # フォント読み込み時にキャッシュを破棄
+        self._bbox_cache.clear()
+        self._glyph_cache.clear()
 
         frame_count = 0
         last_fps_time = time.time()
         actual_fps = 0
+        frame_interval = 1.0 / FPS
+        last_update_value = None
+        last_update_str = ""
+        next_frame_time = time.monotonic()
 
         while self._frame_running:
+            # エンコーダー側が要求するまで待機（過剰生成を防止）
+            if not self._producing.wait(timeout=0.5):
+                continue
             try:
                 # エレベーター状態の安全なコピーを取得
                 state = self.elevator_state.get_safe_copy()
@@ -309,7 +371,7 @@ class ElevatorRTSPFactory(GstRtspServer.RTSPMediaFactory):
                 self._draw_centered_text(draw, title, font_medium, WIDTH//2, 40, 'white')
                 
                 # 現在時刻表示
-                self._draw_centered_text(draw, timestamp, font_small, WIDTH//2, 80, 'lightgray')
+                self._draw_glyph_text(img, timestamp, font_small, WIDTH//2, 80, 'lightgray')
                 
                 # 接続状態表示
                 connection_color = 'lightgreen' if state['connection_status'] == "接続中" else 'red'
@@ -336,14 +398,19 @@ class ElevatorRTSPFactory(GstRtspServer.RTSPMediaFactory):
                 draw.rectangle(status_rect, fill=status_bg, outline=status_border, width=3)
                 
                 # 状態テキスト
-                self._draw_centered_text(draw, status_text, font_large, WIDTH//2, y_pos+25, status_color)
+                self._draw_glyph_text(img, status_text, font_large, WIDTH//2, y_pos+25, status_color)
                 
                 y_pos += 100
                 
+                # 最終更新時刻（変化時のみ整形）
+                if state['last_update'] != last_update_value:
+                    last_update_value = state['last_update']
+                    last_update_str = datetime.fromtimestamp(last_update_value).strftime('%H:%M:%S')
+                
                 # 詳細情報
                 details = [
                     f"荷重: {state['load_weight']}kg",
-                    f"最終更新: {state['last_update'].strftime('%H:%M:%S')}",
+                    f"最終更新: {last_update_str}",
                     f"受信数: {state['message_count']} / エラー数: {state['error_count']}",
                     f"実際FPS: {actual_fps:.1f}"
                 ]
@@ -354,7 +421,7 @@ class ElevatorRTSPFactory(GstRtspServer.RTSPMediaFactory):
                     details.append(f"最終着床: {arrival_time}")
                 
                 for detail in details:
-                    self._draw_centered_text(draw, detail, font_small, WIDTH//2, y_pos, 'lightblue')
+                    self._draw_glyph_text(img, detail, font_small, WIDTH//2, y_pos, 'lightblue')
                     y_pos += 25
                 
                 # 通信ログ表示
@@ -381,7 +448,13 @@ class ElevatorRTSPFactory(GstRtspServer.RTSPMediaFactory):
                     frame_count = 0
                     last_fps_time = current_time
                 
-                time.sleep(1.0 / FPS)
+                # 次フレーム時刻まで待機（処理時間分を差し引き、遅延時は追従）
+                next_frame_time += frame_interval
+                delay = next_frame_time - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_frame_time = time.monotonic()
                 
             except Exception as e:
                 logger.error(f"❌ フレーム生成エラー: {e}")
@@ -391,14 +464,47 @@ class ElevatorRTSPFactory(GstRtspServer.RTSPMediaFactory):
 
     def _draw_centered_text(self, draw, text, font, x, y, color):
         """中央揃えテキスト描画"""
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
+        key = (text, id(font))
+        size = self._bbox_cache.get(key)
+        if size is None:
+            bbox = draw.textbbox((0, 0), text, font=font)
+            size = (bbox[2] - bbox[0], bbox[3] - bbox[1])
+            if len(self._bbox_cache) >= BBOX_CACHE_SIZE:
+                self._bbox_cache.clear()
+            self._bbox_cache[key] = size
+        text_width, text_height = size
         draw.text((x - text_width//2, y - text_height//2), text, font=font, fill=color)
 
+    def _get_glyph(self, font, ch):
+        """グリフ取得（初回のみラスタライズしてアトラスに保存）"""
+        key = (id(font), ch)
+        glyph = self._glyph_cache.get(key)
+        if glyph is None:
+            left, top, right, bottom = font.getbbox(ch)
+            mask = Image.new('L', (max(right - left, 1), max(bottom - top, 1)), 0)
+            ImageDraw.Draw(mask).text((-left, -top), ch, font=font, fill=255)
+            glyph = (mask, left, top, bottom, font.getlength(ch))
+            self._glyph_cache[key] = glyph
+        return glyph
+
+    def _draw_glyph_text(self, img, text, font, x, y, color):
+        """中央揃えテキスト描画（グリフアトラスから転写、毎フレームのラスタライズなし）"""
+        glyphs = [self._get_glyph(font, ch) for ch in text]
+        if not glyphs:
+            return
+        text_width = int(sum(g[4] for g in glyphs))
+        text_height = max(g[3] for g in glyphs) - min(g[2] for g in glyphs)
+        
+        pen_x = x - text_width//2
+        origin_y = y - text_height//2
+        for mask, left, top, _bottom, advance in glyphs:
+            img.paste(color, (int(pen_x) + left, origin_y + top), mask)
+            pen_x += advance
+
     def stop_frames(self):
         """フレーム生成停止"""
         self._frame_running = False
+        self._producing.set()  # 待機中のスレッドを起こす
         if self._frame_thread and self._frame_thread.is_alive():
             self._frame_thread.join(timeout=2.0)
 
@@ -410,6 +516,7 @@ class SerialENQReceiver:
         self.serial_conn: Optional[serial.Serial] = None
         self.running = False
         self.message_queue = queue.Queue(maxsize=MESSAGE_QUEUE_SIZE)
+        self._poll = None
         
         # 受信スレッドと処理スレッドを分離
         self._receive_thread = None
@@ -466,6 +573,10 @@ class SerialENQReceiver:
             if hasattr(self.serial_conn, 'set_buffer_size'):
                 self.serial_conn.set_buffer_size(rx_size=SERIAL_BUFFER_SIZE)
             
+            # 受信待機用 poll 登録（in_waiting の ioctl ポーリングを回避）
+            self._poll = select.poll()
+            self._poll.register(self.serial_conn.fileno(), select.POLLIN)
+            
             logger.info(f"✅ シリアルポート {SERIAL_CONFIG['port']} 接続成功")
             self.elevator_state.set_connection_status("接続中")
         except Exception as e:
@@ -514,6 +625,7 @@ class SerialENQReceiver:
         """生データ受信スレッド（高速化）"""
         logger.info("📥 シリアル生データ受信スレッド開始")
         buffer = bytearray()
+        head = 0  # 未処理データの先頭位置
         reconnect_attempts = 0
         max_reconnect_attempts = 10
         last_data_time = time.time()
@@ -526,18 +638,32 @@ class SerialENQReceiver:
                         time.sleep(1)  # 短縮
                         continue
                     buffer.clear()
+                    head = 0
                     reconnect_attempts = 0
                     last_data_time = time.time()
                 
-                # データ受信（ノンブロッキング）
-                if self.serial_conn.in_waiting > 0:
-                    data = self.serial_conn.read(self.serial_conn.in_waiting)
+                # データ受信（カーネルで到着待ち、最大500ms）
+                events = self._poll.poll(500)
+                if events:
+                    if events[0][1] & (select.POLLHUP | select.POLLERR):
+                        raise serial.SerialException("シリアルポートが切断されました")
+                    try:
+                        data = os.read(self.serial_conn.fileno(), SERIAL_BUFFER_SIZE)
+                    except BlockingIOError:
+                        data = b''
+                    except OSError as e:
+                        raise serial.SerialException(f"シリアル読み込み失敗: {e}")
                     if data:
                         buffer.extend(data)
                         last_data_time = time.time()
                         
                         # ENQメッセージ検索・キューイング
-                        self._extract_enq_messages(buffer)
+                        head = self._extract_enq_messages(buffer, head)
+                        
+                        # 処理済み領域が閾値を超えたらまとめて詰め直す
+                        if head > SERIAL_BUFFER_SIZE:
+                            del buffer[:head]
+                            head = 0
                 
                 # 接続チェック（間隔短縮）
                 if time.time() - last_data_time > 15:  # 15秒に短縮
@@ -546,8 +672,6 @@ class SerialENQReceiver:
                         continue
                     last_data_time = time.time()
                 
-                time.sleep(0.01)  # 10ms（高速化）
-                
             except serial.SerialException as e:
                 logger.error(f"❌ シリアル通信エラー: {e}")
                 self._close_serial()
@@ -570,38 +694,31 @@ class SerialENQReceiver:
 
         logger.info("📥 シリアル生データ受信スレッド終了")
 
-    def _extract_enq_messages(self, buffer: bytearray):
-        """ENQメッセージ抽出・キューイング"""
-        while len(buffer) >= 16:
-            enq_pos = -1
-            for i in range(len(buffer) - 15):
-                if buffer[i] == 0x05:  # ENQ
-                    if i + 16 <= len(buffer):
-                        enq_candidate = buffer[i:i + 16]
-                        if self._validate_enq_message(enq_candidate):
-                            enq_pos = i
-                            break
+    def _extract_enq_messages(self, buffer: bytearray, head: int) -> int:
+        """ENQメッセージ抽出・キューイング（未処理先頭位置を返す）"""
+        pos = head
+        while True:
+            match = ENQ_MESSAGE_PATTERN.search(buffer, pos)
+            if match is None:
+                break
+            enq_message = match.group()  # bytes（キュー渡し用の唯一のコピー）
+            pos = match.end()
             
-            if enq_pos >= 0:
-                enq_message = buffer[enq_pos:enq_pos + 16]
-                buffer[:] = buffer[enq_pos + 16:]
-                
-                # メッセージをキューに追加
+            # メッセージをキューに追加
+            try:
+                self.message_queue.put_nowait(enq_message)
+            except queue.Full:
+                logger.warning("⚠️ メッセージキューが満杯です")
+                # 古いメッセージを破棄
                 try:
+                    self.message_queue.get_nowait()
                     self.message_queue.put_nowait(enq_message)
-                except queue.Full:
-                    logger.warning("⚠️ メッセージキューが満杯です")
-                    # 古いメッセージを破棄
-                    try:
-                        self.message_queue.get_nowait()
-                        self.message_queue.put_nowait(enq_message)
-                    except queue.Empty:
-                        pass
-            else:
-                if len(buffer) > 0:
-                    buffer.pop(0)
-                else:
-                    break
+                except queue.Empty:
+                    pass
+        
+        # 処理済み部分と不正データを読み飛ばす（末尾の未完成メッセージ候補のみ残す）
+        # バッファの詰め直しは呼び出し側でまとめて実施
+        return max(pos, len(buffer) - (ENQ_MESSAGE_LENGTH - 1))
 
     def _process_messages(self):
         """メッセージ処理スレッド"""
@@ -625,45 +742,24 @@ class SerialENQReceiver:
 
     def _validate_enq_message(self, data: bytes) -> bool:
         """ENQメッセージの妥当性チェック"""
-        if len(data) != 16 or data[0] != 0x05:
-            return False
-        
-        try:
-            station = data[1:5]
-            if not all(48 <= b <= 57 for b in station):
-                return False
-            
-            if data[5] != 0x57:  # 'W'
-                return False
-            
-            data_num_bytes = data[6:10]
-            if not all(self._is_hex_char(b) for b in data_num_bytes):
-                return False
-            
-            data_value_bytes = data[10:14]
-            if not all(self._is_hex_char(b) for b in data_value_bytes):
-                return False
-            
-            return True
-            
-        except:
-            return False
-
-    def _is_hex_char(self, byte_val: int) -> bool:
-        """HEX文字かどうかチェック"""
-        return (48 <= byte_val <= 57) or (65 <= byte_val <= 70) or (97 <= byte_val <= 102)
+        return ENQ_MESSAGE_PATTERN.fullmatch(data) is not None
 
     def _parse_enq_message(self, data: bytes):
         """ENQメッセージ解析"""
         try:
-            station = data[1:5].decode('ascii')
-            command = chr(data[5])
-            data_num_str = data[6:10].decode('ascii')
-            data_value_str = data[10:14].decode('ascii')
-            checksum = data[14:16].decode('ascii')
-
-            data_num = int(data_num_str, 16)
-            data_value = int(data_value_str, 16)
+            # チェックサム検証（局番号〜データ値の合計下位8bit）
+            expected = sum(data[1:14]) & 0xFF
+            received = (HEX_NIBBLE[data[14]] << 4) | HEX_NIBBLE[data[15]]
+            if received != expected:
+                logger.warning(f"⚠️ チェックサム不一致: 受信={received:02X} 計算={expected:02X}")
+                self.elevator_state.increment_error_count()
+                return
+
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"局番号: {data[1:5].decode('ascii')}")
+
+            data_num = int(data[6:10], 16)
+            data_value = int(data[10:14], 16)
 
             # 重複チェック
             if self._is_duplicate_message(data_num, data_value):
@@ -8,10 +8,18 @@ import serial
 import time
 import json
 import logging
+import logging.handlers
 import threading
+import queue
 import signal
 import sys
+import struct
+import random
+import atexit
+import binascii
+from collections import deque
 from datetime import datetime
+from types import MappingProxyType
 from typing import Dict, Any, Optional
 
 # ログ設定
@@ -20,16 +28,90 @@ log_dir = os.path.expanduser('~/logs')
 os.makedirs(log_dir, exist_ok=True)
 log_file = os.path.join(log_dir, 'elevator_auto_mode.log')
 
+# ログ出力はキュー経由でバックグラウンドスレッドから書き込み（受信スレッドでI/Oしない）
+# ファイルへは100件ごと・200msごと（WARNING以上は即時）にまとめて書き込み
+LOG_FILE_FLUSH_INTERVAL = 0.2  # ファイルログの定期フラッシュ間隔（秒）
+
+log_queue = queue.Queue(-1)
+log_file_handler = logging.handlers.MemoryHandler(
+    capacity=100,
+    flushLevel=logging.WARNING,
+    target=logging.FileHandler(log_file)
+)
+log_listener = logging.handlers.QueueListener(
+    log_queue,
+    log_file_handler,
+    logging.StreamHandler(sys.stdout)
+)
+_log_file_flush_stop = threading.Event()
+
+def _log_file_flush_loop():
+    """溜まったファイルログを一定間隔で書き出す（100件に満たなくても取りこぼさない）"""
+    while not _log_file_flush_stop.wait(LOG_FILE_FLUSH_INTERVAL):
+        log_file_handler.flush()
+
+def _stop_logging():
+    """終了時に定期フラッシュを止め、キューを吐き出す（ファイルは logging.shutdown でフラッシュ）"""
+    _log_file_flush_stop.set()
+    _log_file_flush_thread.join(timeout=1.0)
+    log_listener.stop()
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file),
-        logging.StreamHandler(sys.stdout)
-    ]
+    handlers=[logging.handlers.QueueHandler(log_queue)]
 )
 logger = logging.getLogger(__name__)
 
+log_listener.start()
+_log_file_flush_thread = threading.Thread(target=_log_file_flush_loop, daemon=True)
+_log_file_flush_thread.start()
+atexit.register(_stop_logging)
+
+# 受信フレーム形式: ENQ(1) 局番号(4) コマンド(1) データ番号(4) データ(4) チェックサム(2)
+_FRAME = struct.Struct('>B4sc4s4s2s')
+
+# 応答対象の局番号（0001: エレベーター / 0002: 自動運転装置）
+_KNOWN_STATIONS = frozenset({"0001", "0002"})
+
+# 通信ログ書き込み設定
+LOG_QUEUE_SIZE = 2048       # 書き込み待ちキュー上限
+LOG_FLUSH_BATCH = 256       # 1回の書き込みでまとめる最大件数
+LOG_FLUSH_INTERVAL = 0.05   # 書き込み間隔（秒）
+LOG_DROP_WARN_INTERVAL = 5  # キュー満杯警告の最小間隔（秒）
+
+# データ番号ごとの表示名（階数系）
+_FLOOR_LABELS = {
+    0x0001: "現在階数",
+    0x0002: "行先階",
+    0x0010: "階数設定",
+    0x0016: "階数設定",  # 自動運転モード
+}
+
+# データ番号ごとの状態更新先とログ文言（階数系）
+_FLOOR_STATUS_UPDATES = {
+    0x0001: ('current_floor', "🏢 現在階数を更新"),
+    0x0002: ('target_floor', "🎯 行先階を更新"),
+    0x0010: ('current_floor', "🏢 階数設定により現在階数を更新"),
+    0x0016: ('current_floor', "🏢 自動運転モード階数設定により現在階数を更新"),
+}
+
+# 扉制御（通常 / 自動運転モード）
+_DOOR_DATA_NUMS = frozenset({0x0011, 0x0017})
+_DOOR_ACTIONS = {0x0001: "開扉", 0x0002: "閉扉", 0x0000: "停止"}
+
+def _iso(ts_ns: int) -> str:
+    """ナノ秒タイムスタンプをISO形式に変換（状態取得時のみ使用）"""
+    return datetime.fromtimestamp(ts_ns / 1e9).isoformat()
+
+# 階数表記（毎フレームの文字列生成を避けるため事前生成）
+_FLOOR_NAMES = {0xFFFF: "B1F"}
+_FLOOR_NAMES.update({i: f"{i}F" for i in range(200)})
+
+def _floor_name(data_value: int) -> str:
+    """データ値を階数表記に変換"""
+    return _FLOOR_NAMES.get(data_value) or f"{data_value}F"
+
 class AutoModeElevatorReceiver:
     """自動運転モード用エレベーター通信受信クラス"""
     
@@ -38,6 +120,7 @@ class AutoModeElevatorReceiver:
         self.baudrate = baudrate
         self.serial_conn: Optional[serial.Serial] = None
         self.running = False
+        self._stop_event = threading.Event()  # 停止要求（待機中のスレッドを即座に起こす）
         self.auto_mode_enabled = False
         
         # 自動運転モード設定
@@ -47,6 +130,7 @@ class AutoModeElevatorReceiver:
             'operation_interval': 10,  # 運転間隔（秒）
             'door_open_time': 5      # ドア開放時間（秒）
         }
+        self._refresh_config()
         
         # 現在の状態
         self.current_status = {
@@ -57,10 +141,41 @@ class AutoModeElevatorReceiver:
             'passengers': 0,
             'last_communication': None
         }
+        # get_status 用の読み取り専用スナップショット（状態変更時のみ再生成）
+        self._status_version = 0
+        self._status_snapshot_version = -1
+        self._status_snapshot = None
         
-        # 通信ログ
-        self.communication_logs = []
+        # ACK/NAK応答伝文（局番号・応答種別ごとに事前生成）
+        self._resp = {
+            (station, is_ack): (b"\x06" if is_ack else b"\x15") + station.encode('ascii')
+            for station in _KNOWN_STATIONS
+            for is_ack in (True, False)
+        }
+        self._resp_hex = {key: response.hex().upper() for key, response in self._resp.items()}
         
+        # 乗客シミュレーション用乱数生成器
+        self._rng = random.Random()
+        
+        # 開扉イベント（乗客出入りワーカーへ受け渡し）
+        self._door_events = queue.Queue()
+        self._door_thread: Optional[threading.Thread] = None
+        
+        # 受信バッファ（読み込み境界をまたぐフレームを蓄積）
+        self._rx_buf = bytearray()
+        
+        # 通信ログ（最新500件を保持）
+        self.communication_logs = deque(maxlen=500)
+        self._log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self._log_thread: Optional[threading.Thread] = None
+        self._log_drop_warned_at = 0.0
+        
+    def _refresh_config(self):
+        """頻繁に参照する設定値を属性に反映（auto_config 変更時に呼び出す）"""
+        self._passenger_weight = self.auto_config['passenger_weight']
+        self._max_passengers = self.auto_config['max_passengers']
+        self._config_snapshot = MappingProxyType(self.auto_config.copy())
+    
     def connect(self) -> bool:
         """シリアルポートに接続"""
         try:
@@ -70,8 +185,10 @@ class AutoModeElevatorReceiver:
                 bytesize=serial.EIGHTBITS,
                 parity=serial.PARITY_EVEN,
                 stopbits=serial.STOPBITS_ONE,
-                timeout=1
+                timeout=0.2,  # 停止要求への応答性を確保
+                inter_byte_timeout=0.05
             )
+            self._rx_buf.clear()
             logger.info(f"✅ シリアルポート {self.port} に接続しました")
             return True
         except Exception as e:
@@ -94,28 +211,31 @@ class AutoModeElevatorReceiver:
     def parse_message(self, message: bytes) -> Optional[Dict[str, Any]]:
         """受信メッセージを解析"""
         try:
-            if len(message) < 16 or message[0] != 0x05:  # ENQ
+            if len(message) < _FRAME.size:
+                return None
+            
+            # メッセージ解析（1回のunpackで全フィールドを切り出し）
+            enq, station, command, data_num, data_value, checksum = _FRAME.unpack_from(message)
+            if enq != 0x05:  # ENQ
                 return None
             
-            # メッセージ解析
-            station = message[1:5].decode('ascii')
-            command = chr(message[5])
-            data_num = message[6:10].decode('ascii')
-            data_value = message[10:14].decode('ascii')
-            checksum = message[14:16].decode('ascii')
+            # チェックサム検証（局番号〜データ、コピーなしで加算）
+            total = sum(memoryview(message)[1:14])
+            if ((total & 0xFF) + ((total >> 8) & 0xFF)) & 0xFF != int(checksum, 16):
+                return None
             
             # データ番号を整数に変換（16進数として解析）
             data_num_int = int(data_num, 16)
             data_value_int = int(data_value, 16)
             
             return {
-                'station': station,
-                'command': command,
+                'station': station.decode('ascii'),
+                'command': command,  # bytes（ログ出力時にデコード）
                 'data_num': data_num_int,
                 'data_value': data_value_int,
-                'raw_data': data_value,
-                'checksum': checksum,
-                'timestamp': datetime.now().isoformat()
+                'raw_data': data_value,  # bytes（ログ出力時にデコード）
+                'checksum': checksum,    # bytes（ログ出力時にデコード）
+                'timestamp_ns': time.time_ns()
             }
         except Exception as e:
             logger.error(f"❌ メッセージ解析エラー: {e}")
@@ -126,44 +246,18 @@ class AutoModeElevatorReceiver:
         data_num = parsed['data_num']
         data_value = parsed['data_value']
         
-        if data_num == 0x0001:  # 現在階数
-            floor_name = "B1F" if data_value == 0xFFFF else f"{data_value}F"
-            description = f"現在階数: {floor_name}"
-        elif data_num == 0x0002:  # 行先階
-            floor_name = "B1F" if data_value == 0xFFFF else f"{data_value}F"
-            description = f"行先階: {floor_name}"
+        floor_label = _FLOOR_LABELS.get(data_num)
+        if floor_label is not None:
+            description = f"{floor_label}: {_floor_name(data_value)}"
         elif data_num == 0x0003:  # 荷重
             description = f"荷重: {data_value}kg"
-        elif data_num == 0x0010:  # 階数設定
-            floor_name = "B1F" if data_value == 0xFFFF else f"{data_value}F"
-            description = f"階数設定: {floor_name}"
-        elif data_num == 0x0011:  # 扉制御
-            if data_value == 0x0001:
-                door_action = "開扉"
-            elif data_value == 0x0002:
-                door_action = "閉扉"
-            elif data_value == 0x0000:
-                door_action = "停止"
-            else:
-                door_action = "不明"
-            description = f"扉制御: {door_action}"
-        elif data_num == 0x0016:  # 階数設定（自動運転モード）
-            floor_name = "B1F" if data_value == 0xFFFF else f"{data_value}F"
-            description = f"階数設定: {floor_name}"
-        elif data_num == 0x0017:  # 扉制御（自動運転モード）
-            if data_value == 0x0001:
-                door_action = "開扉"
-            elif data_value == 0x0002:
-                door_action = "閉扉"
-            elif data_value == 0x0000:
-                door_action = "停止"
-            else:
-                door_action = "不明"
-            description = f"扉制御: {door_action}"
+        elif data_num in _DOOR_DATA_NUMS:  # 扉制御
+            description = f"扉制御: {_DOOR_ACTIONS.get(data_value, '不明')}"
         else:
             description = f"データ番号: {data_num:04X}"
         
-        return f"ENQ(05) 局番号:{parsed['station']} CMD:{parsed['command']} {description} データ:{parsed['raw_data']} チェックサム:{parsed['checksum']}"
+        return (f"ENQ(05) 局番号:{parsed['station']} CMD:{parsed['command'].decode('ascii', 'replace')} {description} "
+                f"データ:{parsed['raw_data'].decode('ascii')} チェックサム:{parsed['checksum'].decode('ascii', 'replace')}")
     
     def send_response(self, station: str, is_ack: bool = True) -> bool:
         """応答送信"""
@@ -171,16 +265,18 @@ class AutoModeElevatorReceiver:
             if not self.serial_conn or not self.serial_conn.is_open:
                 return False
             
-            # ACK/NAK応答作成
-            response = bytearray()
-            response.append(0x06 if is_ack else 0x15)  # ACK or NAK
-            response.extend(station.encode('ascii'))
+            # ACK/NAK応答（事前生成済みの伝文を使用）
+            key = (station, is_ack)
+            response = self._resp.get(key)
+            if response is None:
+                response = (b"\x06" if is_ack else b"\x15") + station.encode('ascii')
+                self._resp[key] = response
+                self._resp_hex[key] = response.hex().upper()
             
             self.serial_conn.write(response)
             
-            response_type = "ACK" if is_ack else "NAK"
-            hex_data = response.hex().upper()
-            logger.info(f"📤 送信: {response_type}({response[0]:02X}) 局番号:{station} | HEX: {hex_data}")
+            logger.info("📤 送信: %s(%02X) 局番号:%s | HEX: %s",
+                        "ACK" if is_ack else "NAK", response[0], station, self._resp_hex[key])
             
             return True
         except Exception as e:
@@ -192,60 +288,79 @@ class AutoModeElevatorReceiver:
         data_num = parsed['data_num']
         data_value = parsed['data_value']
         
-        if data_num == 0x0001:  # 現在階数
-            floor_name = "B1F" if data_value == 0xFFFF else f"{data_value}F"
-            self.current_status['current_floor'] = floor_name
-            logger.info(f"🏢 現在階数を更新: {floor_name} (データ値: {data_value:04X})")
-        elif data_num == 0x0002:  # 行先階
-            floor_name = "B1F" if data_value == 0xFFFF else f"{data_value}F"
-            self.current_status['target_floor'] = floor_name
-            logger.info(f"🎯 行先階を更新: {floor_name} (データ値: {data_value:04X})")
+        floor_update = _FLOOR_STATUS_UPDATES.get(data_num)
+        if floor_update is not None:
+            status_key, log_label = floor_update
+            floor_name = _floor_name(data_value)
+            self.current_status[status_key] = floor_name
+            logger.info("%s: %s (データ値: %04X)", log_label, floor_name, data_value)
         elif data_num == 0x0003:  # 荷重
             self.current_status['load_weight'] = data_value
             # 荷重から乗客数を推定
-            self.current_status['passengers'] = max(0, data_value // self.auto_config['passenger_weight'])
-            logger.info(f"⚖️ 荷重を更新: {data_value}kg, 乗客数: {self.current_status['passengers']}人")
-        elif data_num == 0x0010:  # 階数設定
-            floor_name = "B1F" if data_value == 0xFFFF else f"{data_value}F"
-            self.current_status['current_floor'] = floor_name
-            logger.info(f"🏢 階数設定により現在階数を更新: {floor_name} (データ値: {data_value:04X})")
-        elif data_num == 0x0016:  # 階数設定（自動運転モード）
-            floor_name = "B1F" if data_value == 0xFFFF else f"{data_value}F"
-            self.current_status['current_floor'] = floor_name
-            logger.info(f"🏢 自動運転モード階数設定により現在階数を更新: {floor_name} (データ値: {data_value:04X})")
-        
-        self.current_status['last_communication'] = datetime.now().isoformat()
+            self.current_status['passengers'] = max(0, data_value // self._passenger_weight)
+            logger.info("⚖️ 荷重を更新: %dkg, 乗客数: %d人", data_value, self.current_status['passengers'])
+        
+        self.current_status['last_communication'] = time.time_ns()  # get_status でISO形式に変換
+        self._status_version += 1
     
     def add_communication_log(self, direction: str, message: str, result: str = "success"):
-        """通信ログを追加"""
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
-            'direction': direction,
-            'message': message,
-            'result': result
-        }
-        
-        self.communication_logs.append(log_entry)
-        
-        # ログの最大数を制限（最新500件）
-        if len(self.communication_logs) > 500:
-            self.communication_logs = self.communication_logs[-500:]
+        """通信ログを追加（書き込みはバックグラウンドスレッドでまとめて実施）"""
+        try:
+            self._log_queue.put_nowait((time.time_ns(), direction, message, result))
+        except queue.Full:
+            now = time.time()
+            if now - self._log_drop_warned_at >= LOG_DROP_WARN_INTERVAL:
+                self._log_drop_warned_at = now
+                logger.warning("⚠️ 通信ログキューが満杯のためログを破棄しました")
+    
+    def _log_flush_loop(self):
+        """通信ログ書き込みループ"""
+        log_queue = self._log_queue
+        while True:
+            batch = [log_queue.get()]
+            try:
+                while len(batch) < LOG_FLUSH_BATCH:
+                    batch.append(log_queue.get_nowait())
+            except queue.Empty:
+                pass
+            
+            # None は終了要求
+            stop_requested = None in batch
+            if stop_requested:
+                del batch[batch.index(None):]
+            
+            # タイムスタンプはナノ秒のまま保持（get_status でISO形式に変換）
+            self.communication_logs.extend(
+                {
+                    'ts_ns': ts_ns,
+                    'direction': direction,
+                    'message': message,
+                    'result': result
+                }
+                for ts_ns, direction, message, result in batch
+            )
+            
+            if stop_requested:
+                break
+            time.sleep(LOG_FLUSH_INTERVAL)
     
     def simulate_passenger_activity(self, floor: str) -> Dict[str, int]:
         """乗客の出入りをシミュレート"""
-        import random
+        passenger_weight = self._passenger_weight
+        max_passengers = self._max_passengers
+        randint = self._rng.randint
         
         current_passengers = self.current_status['passengers']
         
         # 降車人数（現在の乗客数まで）
-        exiting = random.randint(0, current_passengers)
+        exiting = randint(0, current_passengers)
         
         # 乗車人数（残り容量まで）
-        remaining_capacity = self.auto_config['max_passengers'] - (current_passengers - exiting)
-        entering = random.randint(0, min(remaining_capacity, self.auto_config['max_passengers']))
+        remaining_capacity = max_passengers - (current_passengers - exiting)
+        entering = randint(0, min(remaining_capacity, max_passengers))
         
         new_passengers = current_passengers - exiting + entering
-        new_weight = new_passengers * self.auto_config['passenger_weight']
+        new_weight = new_passengers * passenger_weight
         
         logger.info(f"🏢 {floor}: 乗車 {entering}人, 降車 {exiting}人 → 総乗客数 {new_passengers}人 ({new_weight}kg)")
         
@@ -267,64 +382,111 @@ class AutoModeElevatorReceiver:
         if data_num == 0x0011 and parsed['data_value'] == 0x0001:  # 開扉
             current_floor = self.current_status.get('current_floor', '1F')
             
-            # 少し待ってから乗客の出入りをシミュレート
-            def delayed_passenger_simulation():
-                time.sleep(2)  # 扉が開くまで待機
-                passenger_activity = self.simulate_passenger_activity(current_floor)
-                
-                # 新しい荷重を記録
-                self.current_status['passengers'] = passenger_activity['total_passengers']
-                self.current_status['load_weight'] = passenger_activity['total_weight']
-                
-                logger.info(f"🤖 自動運転モード: {current_floor}での乗客出入り完了")
+            # 乗客出入りワーカーに通知（2秒後にシミュレート）
+            self._door_events.put_nowait(current_floor)
+    
+    def _door_event_loop(self):
+        """乗客出入りシミュレーションワーカー（開扉イベントを1件ずつ処理）"""
+        while True:
+            current_floor = self._door_events.get()
+            if current_floor is None:  # 終了要求
+                break
+            
+            # 扉が開くまで待機（停止要求があれば即座に終了）
+            if self._stop_event.wait(2):
+                break
+            
+            passenger_activity = self.simulate_passenger_activity(current_floor)
             
-            # 別スレッドで実行
-            threading.Thread(target=delayed_passenger_simulation, daemon=True).start()
+            # 新しい荷重を記録
+            self.current_status['passengers'] = passenger_activity['total_passengers']
+            self.current_status['load_weight'] = passenger_activity['total_weight']
+            self._status_version += 1
+            
+            logger.info(f"🤖 自動運転モード: {current_floor}での乗客出入り完了")
     
     def listen(self):
         """メッセージ受信ループ"""
         logger.info("🎧 メッセージ受信を開始します...")
         
-        while self.running:
+        # ループ内で使う属性・メソッドをローカルに束縛
+        ser = self.serial_conn
+        rx_buf = self._rx_buf
+        handle_frame = self._handle_frame
+        stop_wait = self._stop_event.wait
+        is_set = self._stop_event.is_set
+        
+        while not is_set():
             try:
-                if not self.serial_conn or not self.serial_conn.is_open:
-                    time.sleep(1)
+                if not ser or not ser.is_open:
+                    stop_wait(1)
+                    ser = self.serial_conn  # 再接続後のポートを取り直す
                     continue
                 
-                # データ受信
-                if self.serial_conn.in_waiting > 0:
-                    data = self.serial_conn.read(self.serial_conn.in_waiting)
-                    
-                    if len(data) >= 16:  # 最小メッセージ長
-                        parsed = self.parse_message(data)
-                        
-                        if parsed:
-                            # 人間が読める形式でログ出力
-                            readable_msg = self.format_readable_message(parsed)
-                            logger.info(f"📨 受信: {readable_msg}")
-                            
-                            # 通信ログに追加
-                            self.add_communication_log("receive", readable_msg)
-                            
-                            # 状態更新
-                            self.update_status_from_message(parsed)
-                            
-                            # 自動運転モードのロジック処理
-                            self.process_auto_mode_logic(parsed)
-                            
-                            # 正常応答送信（受信した局番号で応答）
-                            response_station = "0002" if parsed['station'] == "0002" else "0001"
-                            self.send_response(response_station, True)
-                        else:
-                            logger.warning(f"⚠️ 無効なメッセージ: {data.hex()}")
-                            self.add_communication_log("receive", f"無効なメッセージ: {data.hex()}", "error")
+                # データ受信（1フレーム分を上限にブロッキング読み込み、途中で切れても蓄積）
+                data = ser.read(16)
+                if not data:  # タイムアウト
+                    continue
                 
-                time.sleep(0.1)  # CPU使用率を下げる
+                # 後続バイトがあればまとめて読み込み
+                waiting = ser.in_waiting
+                if waiting:
+                    data += ser.read(waiting)
+                
+                rx_buf += data
+                
+                # ENQ を起点に16バイト単位でフレームを切り出し
+                while True:
+                    idx = rx_buf.find(0x05)
+                    if idx < 0:
+                        rx_buf.clear()  # ENQ なし = 全て不要データ
+                        break
+                    if len(rx_buf) - idx < 16:
+                        if idx:
+                            del rx_buf[:idx]  # 先頭の不要データを破棄し続きを待つ
+                        break
+                    
+                    frame = bytes(rx_buf[idx:idx + 16])
+                    if handle_frame(frame):
+                        del rx_buf[:idx + 16]
+                    else:
+                        del rx_buf[:idx + 1]  # 次の ENQ から再同期
                 
             except Exception as e:
                 logger.error(f"❌ 受信エラー: {e}")
                 self.add_communication_log("system", f"受信エラー: {e}", "error")
-                time.sleep(1)
+                stop_wait(1)
+    
+    def _handle_frame(self, frame: bytes) -> bool:
+        """1フレーム分の受信処理（正常に解析できたら True）"""
+        parsed = self.parse_message(frame)
+        
+        if not parsed:
+            hex_data = binascii.hexlify(frame).decode('ascii')  # ログ出力と通信ログで共用
+            logger.warning("⚠️ 無効なメッセージ: %s", hex_data)
+            self.add_communication_log("receive", f"無効なメッセージ: {hex_data}", "error")
+            return False
+        
+        # 人間が読める形式に1回だけ整形（ログ出力と通信ログで共用）
+        readable_msg = self.format_readable_message(parsed)
+        logger.info("📨 受信: %s", readable_msg)
+        
+        # 通信ログに追加
+        self.add_communication_log("receive", readable_msg)
+        
+        # 状態更新
+        self.update_status_from_message(parsed)
+        
+        # 自動運転モードのロジック処理
+        self.process_auto_mode_logic(parsed)
+        
+        # 正常応答送信（受信した局番号で応答）
+        station = parsed['station']
+        if station in _KNOWN_STATIONS:
+            self.send_response(station, True)
+        else:
+            logger.warning("⚠️ 未知の局番号のため応答しません: %s", station)
+        return True
     
     def enable_auto_mode(self):
         """自動運転モードを有効化"""
@@ -340,17 +502,45 @@ class AutoModeElevatorReceiver:
     
     def get_status(self) -> Dict[str, Any]:
         """現在の状態を取得"""
+        # 状態が変化した時のみスナップショットを作り直す
+        version = self._status_version
+        if self._status_snapshot_version != version:
+            current_status = self.current_status.copy()
+            if current_status['last_communication'] is not None:
+                current_status['last_communication'] = _iso(current_status['last_communication'])
+            self._status_snapshot = MappingProxyType(current_status)
+            self._status_snapshot_version = version
+        
+        communication_logs = [
+            {
+                'timestamp': _iso(entry['ts_ns']),
+                'direction': entry['direction'],
+                'message': entry['message'],
+                'result': entry['result']
+            }
+            for entry in list(self.communication_logs)[-10:]  # 最新10件
+        ]
+        
         return {
             'auto_mode_enabled': self.auto_mode_enabled,
-            'current_status': self.current_status.copy(),
-            'auto_config': self.auto_config.copy(),
-            'communication_logs': self.communication_logs[-10:],  # 最新10件
+            'current_status': self._status_snapshot,
+            'auto_config': self._config_snapshot,
+            'communication_logs': communication_logs,
             'connection_status': 'connected' if (self.serial_conn and self.serial_conn.is_open) else 'disconnected'
         }
     
     def start(self):
         """受信開始"""
         self.running = True
+        self._stop_event.clear()
+        
+        # 通信ログ書き込みスレッド開始
+        self._log_thread = threading.Thread(target=self._log_flush_loop, daemon=True)
+        self._log_thread.start()
+        
+        # 乗客出入りワーカー開始
+        self._door_thread = threading.Thread(target=self._door_event_loop, daemon=True)
+        self._door_thread.start()
         
         if self.connect():
             # 自動運転モードを有効化
@@ -363,9 +553,8 @@ class AutoModeElevatorReceiver:
             logger.info("🚀 自動運転モード用エレベーター受信システムを開始しました")
             
             try:
-                while self.running:
-                    # 定期的に状態をログ出力
-                    time.sleep(30)
+                # 定期的に状態をログ出力（停止要求で即座に抜ける）
+                while not self._stop_event.wait(30):
                     status = self.get_status()
                     logger.info(f"📊 現在の状態: 階数={status['current_status']['current_floor']}, "
                               f"乗客数={status['current_status']['passengers']}人, "
@@ -379,8 +568,20 @@ class AutoModeElevatorReceiver:
     def stop(self):
         """受信停止"""
         self.running = False
+        self._stop_event.set()
         self.disable_auto_mode()
         self.disconnect()
+        
+        # 乗客出入りワーカーを終了
+        if self._door_thread and self._door_thread.is_alive():
+            self._door_events.put_nowait(None)
+            self._door_thread.join(timeout=1.0)
+        
+        # 残りの通信ログを書き込んでから書き込みスレッドを終了
+        if self._log_thread and self._log_thread.is_alive():
+            self._log_queue.put(None)
+            self._log_thread.join(timeout=1.0)
+        
         logger.info("✅ 自動運転モード用エレベーター受信システムを停止しました")
 
 def signal_handler(signum, frame):
@@ -9,12 +9,16 @@ import serial
 import time
 import json
 import logging
+import logging.handlers
 import threading
 import signal
 import sys
 import random
+import selectors
+from collections import deque
+from dataclasses import dataclass, asdict
 from datetime import datetime
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple, Union
 
 # ログ設定
 import os
@@ -22,16 +26,67 @@ log_dir = os.path.expanduser('~/logs')
 os.makedirs(log_dir, exist_ok=True)
 log_file = os.path.join(log_dir, 'elevator_auto_pilot.log')
 
+# ファイルへは200件ごと（WARNING以上は即時）にまとめて書き込み（SDカードへの細かい書き込みを削減）
+file_log_handler = logging.handlers.MemoryHandler(
+    capacity=200,
+    flushLevel=logging.WARNING,
+    target=logging.FileHandler(log_file)
+)
+
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
     handlers=[
-        logging.FileHandler(log_file),
+        file_log_handler,
         logging.StreamHandler(sys.stdout)
     ]
 )
 logger = logging.getLogger(__name__)
 
+# 状態ログの出力間隔（秒）
+STATUS_LOG_INTERVAL = 60
+
+# ログファイルの定期フラッシュ間隔（秒）
+LOG_FLUSH_INTERVAL = 10
+
+# USBシリアルの latency_timer（ミリ秒）
+LATENCY_TIMER_MS = 1
+
+# コマンド説明文キャッシュ上限
+DESC_CACHE_SIZE = 256
+
+# 16進ASCII変換テーブル（データ値は実運用の範囲 0x000〜0xFFF のみ事前生成、範囲外は都度変換）
+HEX4_TABLE_SIZE = 0x1000
+_HEX2 = tuple(b"%02X" % i for i in range(0x100))
+_HEX4 = tuple(b"%04X" % i for i in range(HEX4_TABLE_SIZE))
+
+def _iso(ts_ns: int) -> str:
+    """ナノ秒タイムスタンプをISO形式に変換（状態取得時のみ使用）"""
+    return datetime.fromtimestamp(ts_ns / 1e9).isoformat()
+
+@dataclass
+class PilotConfig:
+    """自動運転設定"""
+    passenger_weight: int = 60         # 1人あたりの重量（kg）
+    max_passengers: int = 10           # 最大乗客数
+    min_floor: int = 1                 # 最低階
+    max_floor: int = 5                 # 最高階
+    operation_interval: int = 15       # 運転間隔（秒）
+    door_open_time: int = 8            # ドア開放時間（秒）
+    travel_time_per_floor: int = 3     # 1階あたりの移動時間（秒）
+    passenger_boarding_time: int = 2   # 乗客乗降時間（秒）
+
+@dataclass
+class ElevatorStatus:
+    """エレベーターの現在の状態"""
+    current_floor: int = 1
+    target_floor: Optional[int] = None
+    door_status: str = 'closed'
+    load_weight: int = 0
+    passengers: int = 0
+    is_moving: bool = False
+    last_communication: Optional[str] = None
+
 class ElevatorAutoPilot:
     """エレベーター自動運転パイロットクラス"""
     
@@ -43,27 +98,10 @@ class ElevatorAutoPilot:
         self.auto_pilot_enabled = False
         
         # 自動運転設定
-        self.config = {
-            'passenger_weight': 60,      # 1人あたりの重量（kg）
-            'max_passengers': 10,        # 最大乗客数
-            'min_floor': 1,              # 最低階
-            'max_floor': 5,              # 最高階
-            'operation_interval': 15,    # 運転間隔（秒）
-            'door_open_time': 8,         # ドア開放時間（秒）
-            'travel_time_per_floor': 3,  # 1階あたりの移動時間（秒）
-            'passenger_boarding_time': 2, # 乗客乗降時間（秒）
-        }
+        self.config = PilotConfig()
         
         # 現在の状態
-        self.current_status = {
-            'current_floor': 1,
-            'target_floor': None,
-            'door_status': 'closed',
-            'load_weight': 0,
-            'passengers': 0,
-            'is_moving': False,
-            'last_communication': None
-        }
+        self.current_status = ElevatorStatus()
         
         # 自動運転シナリオ
         self.scenarios = [
@@ -75,11 +113,51 @@ class ElevatorAutoPilot:
         
         self.current_scenario = self.scenarios[1]  # デフォルトは昼間
         
-        # 通信ログ
-        self.communication_logs = []
+        # 時刻（0〜23時）→ シナリオの対応表
+        # 7〜9時: 朝の通勤ラッシュ / 17〜19時: 夕方の帰宅ラッシュ / 22〜6時: 深夜の軽い利用 / その他: 昼間の軽い利用
+        self._scenario_by_hour = tuple(
+            self.scenarios[0] if 7 <= hour <= 9 else
+            self.scenarios[2] if 17 <= hour <= 19 else
+            self.scenarios[3] if 22 <= hour or hour <= 6 else
+            self.scenarios[1]
+            for hour in range(24)
+        )
+        self._last_scenario_hour = -1  # 前回シナリオを決定した時刻
+        
+        # 次の目標階の候補（現在階を除く）を事前計算
+        floors = range(self.config.min_floor, self.config.max_floor + 1)
+        self._next_floor_table = {
+            (scenario['name'], cf): tuple(f for f in scenario['target_floors'] if f != cf)
+            for scenario in self.scenarios
+            for cf in floors
+        }
+        self._all_floors_except = {cf: tuple(f for f in floors if f != cf) for cf in floors}
+        
+        # 乱数生成器（シナリオ・乗客シミュレーション用）
+        self._rng = random.Random()
+        
+        # 送信伝文の固定部分（局番号・コマンド・データ番号ごとに事前生成）
+        self._frame_prefixes = {
+            ("0001", "W", data_num): self._build_frame_prefix("0001", "W", data_num)
+            for data_num in (0x0010, 0x0011, 0x0003)
+        }
+        
+        # コマンド説明文のキャッシュ（(データ番号, データ値) → 説明文）
+        self._desc_cache = {}
+        
+        # 送信バッファ（連続するコマンドを1回の write にまとめる）
+        self._tx_buf = bytearray()
+        self._tx_pending = []  # 送信バッファ中の伝文のログ情報（実際に write した時点で記録）
+        
+        # 通信ログ（最新500件を保持）
+        self.communication_logs = deque(maxlen=500)
         
         # 自動運転スレッド
         self.auto_pilot_thread = None
+        self._log_flush_thread = None
+        self._log_flush_stop = threading.Event()  # ログ定期フラッシュの停止要求（stop() のみが設定）
+        self._wake_r, self._wake_w = os.pipe()  # start() の待機を stop() から起こすためのパイプ
+        self._stop_event = threading.Event()  # 自動運転停止要求（待機中のスレッドを即座に起こす）
         
     def connect(self) -> bool:
         """シリアルポートに接続"""
@@ -93,58 +171,123 @@ class ElevatorAutoPilot:
                 timeout=1
             )
             logger.info(f"✅ シリアルポート {self.port} に接続しました")
+            self._set_low_latency()
             return True
         except Exception as e:
             logger.error(f"❌ シリアルポート接続エラー: {e}")
             return False
     
+    def _set_low_latency(self):
+        """USBシリアル（FTDI等）の latency_timer を短縮（既定16ms → 1ms）"""
+        device = os.path.basename(os.path.realpath(self.port))
+        latency_path = f"/sys/bus/usb-serial/devices/{device}/latency_timer"
+        try:
+            with open(latency_path, 'w') as f:
+                f.write(str(LATENCY_TIMER_MS))
+            logger.info(f"⚡ {device} の latency_timer を {LATENCY_TIMER_MS}ms に設定しました")
+        except OSError as e:
+            # USBシリアル以外・Linux以外・権限不足の場合はそのまま続行
+            logger.warning(f"⚠️ latency_timer を設定できません（{latency_path}）: {e}")
+    
     def disconnect(self):
         """シリアルポート切断"""
         if self.serial_conn and self.serial_conn.is_open:
             self.serial_conn.close()
             logger.info("📡 シリアルポートを切断しました")
     
-    def calculate_checksum(self, data: bytes) -> int:
-        """チェックサム計算"""
-        total = sum(data)
-        lower_byte = total & 0xFF
-        upper_byte = (total >> 8) & 0xFF
-        return (lower_byte + upper_byte) & 0xFF
+    @staticmethod
+    def calculate_checksum(data: bytes, initial: int = 0) -> int:
+        """チェックサム計算
+        
+        data は bytes / bytearray / memoryview のいずれも可（コピーせずに加算）。
+        initial に固定部分の加算済み合計を渡すと、可変部分のみの加算で済む。
+        """
+        total = initial + sum(data)  # 組み込み sum はCレベルでバイト列を一括加算
+        return ((total & 0xFF) + ((total >> 8) & 0xFF)) & 0xFF
+    
+    @staticmethod
+    def _build_frame_prefix(station: str, command: str, data_num: int):
+        """送信伝文の固定部分（ENQ + 局番号 + コマンド + データ番号）とその加算値を生成"""
+        prefix = b"\x05" + station.encode('ascii') + command.encode('ascii') + b"%04X" % data_num
+        return prefix, sum(prefix)
     
-    def send_command(self, station: str, command: str, data_num: int, data_value: int) -> bool:
-        """コマンド送信"""
+    def send_command(self, station: str, command: str, data_num: int, data_value: int,
+                     flush: bool = True) -> bool:
+        """コマンド送信（flush=False の場合は送信バッファに溜め、次の flush でまとめて送信）
+        
+        送信ログ・通信ログは実際に write した時点（_flush）で記録する。
+        """
         try:
             if not self.serial_conn or not self.serial_conn.is_open:
                 return False
             
-            # メッセージ作成
-            message = bytearray()
-            message.append(0x05)  # ENQ
-            message.extend(station.encode('ascii'))
-            message.append(ord(command))
-            message.extend(f"{data_num:04X}".encode('ascii'))
-            message.extend(f"{data_value:04X}".encode('ascii'))
-            
-            # チェックサム計算
-            checksum = self.calculate_checksum(message)
-            message.extend(f"{checksum:02X}".encode('ascii'))
+            # メッセージ作成（固定部分は事前生成済みのものを使用）
+            key = (station, command, data_num)
+            frame_prefix = self._frame_prefixes.get(key)
+            if frame_prefix is None:
+                frame_prefix = self._build_frame_prefix(station, command, data_num)
+                self._frame_prefixes[key] = frame_prefix
+            prefix, prefix_sum = frame_prefix
+            value = _HEX4[data_value] if 0 <= data_value < HEX4_TABLE_SIZE else b"%04X" % data_value
             
-            # 送信
-            self.serial_conn.write(message)
-            
-            # ログ出力
-            data_desc = self.format_command_description(data_num, data_value)
-            logger.info(f"📤 送信: ENQ(05) 局番号:{station} CMD:{command} {data_desc} データ:{data_value:04X} チェックサム:{checksum:02X}")
+            # チェックサム計算（固定部分の合計は事前計算済み）
+            checksum = ElevatorAutoPilot.calculate_checksum(value, prefix_sum)
             
-            # 通信ログに追加
-            self.add_communication_log("send", f"ENQ(05) 局番号:{station} CMD:{command} {data_desc}")
+            # 送信（送信バッファへ直接書き込み、まとめて1回の write で送出）
+            tx_buf = self._tx_buf
+            tx_buf += prefix
+            tx_buf += value
+            tx_buf += _HEX2[checksum]
+            self._tx_pending.append((station, command, data_num, data_value, checksum))
+            if flush:
+                return self._flush()
             
             return True
         except Exception as e:
             logger.error(f"❌ コマンド送信エラー: {e}")
             return False
     
+    def _flush(self) -> bool:
+        """送信バッファの伝文をまとめて送信し、伝文ごとに送信結果を記録"""
+        if not self._tx_buf:
+            return True
+        pending = self._tx_pending
+        try:
+            self.serial_conn.write(self._tx_buf)
+        except Exception as e:
+            logger.error(f"❌ コマンド送信エラー: {e}")
+            for station, command, data_num, data_value, checksum in pending:
+                data_desc = self.format_command_description(data_num, data_value)
+                logger.error("❌ 未送信: ENQ(05) 局番号:%s CMD:%s %s データ:%04X チェックサム:%02X",
+                             station, command, data_desc, data_value, checksum)
+                self.add_communication_log("send", (station, command, data_desc), "error")
+            return False
+        finally:
+            self._tx_buf.clear()
+            self._tx_pending = []
+        
+        for station, command, data_num, data_value, checksum in pending:
+            # ログ出力
+            data_desc = self.format_command_description(data_num, data_value)
+            logger.info("📤 送信: ENQ(05) 局番号:%s CMD:%s %s データ:%04X チェックサム:%02X",
+                        station, command, data_desc, data_value, checksum)
+            
+            # 通信ログに追加
+            self.add_communication_log("send", (station, command, data_desc))
+        return True
+    
     def format_command_description(self, data_num: int, data_value: int) -> str:
+        """コマンドの説明を生成（同じ組み合わせは生成済みの文字列を再利用）"""
+        key = (data_num, data_value)
+        description = self._desc_cache.get(key)
+        if description is None:
+            if len(self._desc_cache) >= DESC_CACHE_SIZE:
+                self._desc_cache.clear()
+            description = self._desc_cache[key] = ElevatorAutoPilot._build_command_description(data_num, data_value)
+        return description
+    
+    @staticmethod
+    def _build_command_description(data_num: int, data_value: int) -> str:
         """コマンドの説明を生成"""
         if data_num == 0x0010:  # 階数設定
             floor_name = "B1F" if data_value == 0xFFFF else f"{data_value}F"
@@ -161,62 +304,71 @@ class ElevatorAutoPilot:
         else:
             return f"データ番号: {data_num:04X}"
     
-    def add_communication_log(self, direction: str, message: str, result: str = "success"):
-        """通信ログを追加"""
-        log_entry = {
-            'timestamp': datetime.now().isoformat(),
+    def add_communication_log(self, direction: str, message: Union[str, Tuple[str, str, str]],
+                              result: str = "success"):
+        """通信ログを追加
+        
+        message は文字列、または送信伝文の (局番号, コマンド, 説明) タプル。
+        文字列への整形は get_status で参照されたときのみ行う。
+        """
+        self.communication_logs.append((time.time_ns(), direction, message, result))
+    
+    @staticmethod
+    def _format_log(entry: Tuple[int, str, Any, str]) -> Dict[str, str]:
+        """通信ログ1件を表示用に整形"""
+        timestamp_ns, direction, message, result = entry
+        if isinstance(message, tuple):
+            station, command, data_desc = message
+            message = f"ENQ(05) 局番号:{station} CMD:{command} {data_desc}"
+        return {
+            'timestamp': _iso(timestamp_ns),
             'direction': direction,
             'message': message,
             'result': result
         }
-        
-        self.communication_logs.append(log_entry)
-        
-        # ログの最大数を制限（最新500件）
-        if len(self.communication_logs) > 500:
-            self.communication_logs = self.communication_logs[-500:]
     
-    def set_floor(self, floor: int) -> bool:
+    def set_floor(self, floor: int, flush: bool = True) -> bool:
         """階数設定"""
-        if floor < self.config['min_floor'] or floor > self.config['max_floor']:
+        if floor < self.config.min_floor or floor > self.config.max_floor:
             logger.warning(f"⚠️ 無効な階数: {floor}")
             return False
         
-        success = self.send_command("0001", "W", 0x0010, floor)
+        success = self.send_command("0001", "W", 0x0010, floor, flush)
         if success:
-            self.current_status['target_floor'] = floor
-            logger.info(f"🎯 目標階数を設定: {floor}F")
+            self.current_status.target_floor = floor
+            logger.info("🎯 目標階数を設定: %dF", floor)
         return success
     
-    def open_door(self) -> bool:
+    def open_door(self, flush: bool = True) -> bool:
         """扉を開く"""
-        success = self.send_command("0001", "W", 0x0011, 0x0001)
+        success = self.send_command("0001", "W", 0x0011, 0x0001, flush)
         if success:
-            self.current_status['door_status'] = 'opening'
+            self.current_status.door_status = 'opening'
             logger.info("🚪 扉を開いています...")
         return success
     
-    def close_door(self) -> bool:
+    def close_door(self, flush: bool = True) -> bool:
         """扉を閉じる"""
-        success = self.send_command("0001", "W", 0x0011, 0x0002)
+        success = self.send_command("0001", "W", 0x0011, 0x0002, flush)
         if success:
-            self.current_status['door_status'] = 'closing'
+            self.current_status.door_status = 'closing'
             logger.info("🚪 扉を閉じています...")
         return success
     
-    def set_load(self, weight: int) -> bool:
+    def set_load(self, weight: int, flush: bool = True) -> bool:
         """荷重設定"""
-        success = self.send_command("0001", "W", 0x0003, weight)
+        success = self.send_command("0001", "W", 0x0003, weight, flush)
         if success:
-            self.current_status['load_weight'] = weight
-            self.current_status['passengers'] = max(0, weight // self.config['passenger_weight'])
-            logger.info(f"⚖️ 荷重を設定: {weight}kg ({self.current_status['passengers']}人)")
+            self.current_status.load_weight = weight
+            self.current_status.passengers = max(0, weight // self.config.passenger_weight)
+            logger.info("⚖️ 荷重を設定: %dkg (%d人)", weight, self.current_status.passengers)
         return success
     
-    def simulate_passenger_activity(self, floor: int) -> Dict[str, int]:
-        """乗客の出入りをシミュレート"""
-        current_passengers = self.current_status['passengers']
+    def _passenger_step(self, floor: int, current_passengers: int) -> Tuple[int, int]:
+        """1回の停止での (乗車人数, 降車人数) を計算"""
         scenario = self.current_scenario
+        max_passengers = self.config.max_passengers
+        randint = self._rng.randint
         
         # 降車人数（現在の乗客数まで）
         if floor in scenario['target_floors']:
@@ -224,25 +376,33 @@ class ElevatorAutoPilot:
             exit_rate = 0.6 if floor != 1 else 0.8  # 1階では多くの人が降車
             exiting = min(current_passengers, int(current_passengers * exit_rate))
         else:
-            exiting = random.randint(0, min(2, current_passengers))
+            exiting = randint(0, min(2, current_passengers))
         
         # 乗車人数（残り容量まで）
-        remaining_capacity = self.config['max_passengers'] - (current_passengers - exiting)
+        remaining_capacity = max_passengers - (current_passengers - exiting)
         
         # シナリオに基づく乗車人数
         if floor == 1:
             # 1階では多くの人が乗車
-            max_entering = min(remaining_capacity, int(self.config['max_passengers'] * scenario['passenger_rate']))
-            entering = random.randint(0, max_entering)
+            max_entering = min(remaining_capacity, int(max_passengers * scenario['passenger_rate']))
+            entering = randint(0, max_entering)
         else:
             # 他の階では少ない乗車
             max_entering = min(remaining_capacity, 3)
-            entering = random.randint(0, max_entering) if random.random() < scenario['passenger_rate'] else 0
+            entering = randint(0, max_entering) if self._rng.random() < scenario['passenger_rate'] else 0
+        
+        return entering, exiting
+    
+    def simulate_passenger_activity(self, floor: int) -> Dict[str, int]:
+        """乗客の出入りをシミュレート"""
+        current_passengers = self.current_status.passengers
+        entering, exiting = self._passenger_step(floor, current_passengers)
         
         new_passengers = current_passengers - exiting + entering
-        new_weight = new_passengers * self.config['passenger_weight']
+        new_weight = new_passengers * self.config.passenger_weight
         
-        logger.info(f"🏢 {floor}F: 乗車 {entering}人, 降車 {exiting}人 → 総乗客数 {new_passengers}人 ({new_weight}kg)")
+        logger.info("🏢 %dF: 乗車 %d人, 降車 %d人 → 総乗客数 %d人 (%dkg)",
+                    floor, entering, exiting, new_passengers, new_weight)
         
         return {
             'entering': entering,
@@ -251,55 +411,75 @@ class ElevatorAutoPilot:
             'total_weight': new_weight
         }
     
+    def simulate_passenger_batch(self, floors: List[int], initial_passengers: int = 0) -> List[Dict[str, int]]:
+        """複数の停止階について乗客の出入りをまとめてシミュレート（リプレイ・負荷試験用）
+        
+        現在の状態（current_status）は変更せず、停止ごとのログも出力しない。
+        """
+        step = self._passenger_step
+        passenger_weight = self.config.passenger_weight
+        passengers = initial_passengers
+        results = []
+        append = results.append
+        
+        for floor in floors:
+            entering, exiting = step(floor, passengers)
+            passengers += entering - exiting
+            append({
+                'entering': entering,
+                'exiting': exiting,
+                'total_passengers': passengers,
+                'total_weight': passengers * passenger_weight
+            })
+        
+        return results
+    
     def select_next_floor(self) -> int:
         """次の目標階を選択"""
-        current_floor = self.current_status['current_floor']
+        current_floor = self.current_status.current_floor
         scenario = self.current_scenario
+        rng = self._rng
         
         # 乗客がいる場合は目標階を優先
-        if self.current_status['passengers'] > 0:
+        if self.current_status.passengers > 0:
             # 目標階からランダムに選択
-            possible_floors = [f for f in scenario['target_floors'] if f != current_floor]
+            possible_floors = self._next_floor_table[scenario['name'], current_floor]
             if possible_floors:
-                return random.choice(possible_floors)
+                return rng.choice(possible_floors)
         
         # 乗客がいない場合は1階に戻るか、ランダムに移動
-        if current_floor != 1 and random.random() < 0.4:
+        if current_floor != 1 and rng.random() < 0.4:
             return 1  # 1階に戻る確率40%
         
         # ランダムな階を選択
-        possible_floors = list(range(self.config['min_floor'], self.config['max_floor'] + 1))
-        possible_floors = [f for f in possible_floors if f != current_floor]
-        return random.choice(possible_floors)
+        return rng.choice(self._all_floors_except[current_floor])
     
     def change_scenario(self):
         """シナリオを変更"""
         current_hour = datetime.now().hour
         
-        if 7 <= current_hour <= 9:
-            self.current_scenario = self.scenarios[0]  # 朝の通勤ラッシュ
-        elif 17 <= current_hour <= 19:
-            self.current_scenario = self.scenarios[2]  # 夕方の帰宅ラッシュ
-        elif 22 <= current_hour or current_hour <= 6:
-            self.current_scenario = self.scenarios[3]  # 深夜の軽い利用
-        else:
-            self.current_scenario = self.scenarios[1]  # 昼間の軽い利用
+        # 前回と同じ時間帯ならシナリオは変わらない
+        if current_hour == self._last_scenario_hour:
+            return
+        self._last_scenario_hour = current_hour
+        
+        self.current_scenario = self._scenario_by_hour[current_hour]
         
-        logger.info(f"🎭 シナリオ変更: {self.current_scenario['name']}")
+        logger.info("🎭 シナリオ変更: %s", self.current_scenario['name'])
     
     def execute_elevator_operation(self):
         """エレベーター運転を実行"""
         try:
             # シナリオ変更チェック
-            if random.random() < 0.1:  # 10%の確率でシナリオ変更
+            if self._rng.random() < 0.1:  # 10%の確率でシナリオ変更
                 self.change_scenario()
             
-            current_floor = self.current_status['current_floor']
+            current_floor = self.current_status.current_floor
             
             # 次の目標階を選択
             target_floor = self.select_next_floor()
             
-            logger.info(f"🚀 自動運転開始: {current_floor}F → {target_floor}F")
+            logger.info("🚀 自動運転開始: %dF → %dF", current_floor, target_floor)
             
             # 1. 扉を開く
             self.open_door()
@@ -310,26 +490,28 @@ class ElevatorAutoPilot:
             
             # 3. 荷重を更新
             self.set_load(passenger_activity['total_weight'])
-            time.sleep(self.config['passenger_boarding_time'])
+            time.sleep(self.config.passenger_boarding_time)
             
-            # 4. 扉を閉じる
-            self.close_door()
+            # 4. 扉を閉じる（移動する場合は階数設定とまとめて送信）
+            moving = target_floor != current_floor
+            self.close_door(flush=not moving)
+            if moving:
+                self.current_status.is_moving = True
+                self.set_floor(target_floor)
+                self._flush()  # 階数設定が拒否された場合も扉制御は送出
             time.sleep(2)  # 扉が閉じるまで待機
             
             # 5. 目標階に移動
-            if target_floor != current_floor:
-                self.current_status['is_moving'] = True
-                self.set_floor(target_floor)
-                
+            if moving:
                 # 移動時間をシミュレート
-                travel_time = abs(target_floor - current_floor) * self.config['travel_time_per_floor']
-                logger.info(f"🏃 移動中... 予想時間: {travel_time}秒")
+                travel_time = abs(target_floor - current_floor) * self.config.travel_time_per_floor
+                logger.info("🏃 移動中... 予想時間: %d秒", travel_time)
                 time.sleep(travel_time)
                 
                 # 現在階を更新
-                self.current_status['current_floor'] = target_floor
-                self.current_status['is_moving'] = False
-                logger.info(f"✅ {target_floor}F に到着しました")
+                self.current_status.current_floor = target_floor
+                self.current_status.is_moving = False
+                logger.info("✅ %dF に到着しました", target_floor)
             
             # 6. 到着階で扉を開く
             self.open_door()
@@ -340,39 +522,41 @@ class ElevatorAutoPilot:
             
             # 8. 荷重を更新
             self.set_load(passenger_activity['total_weight'])
-            time.sleep(self.config['passenger_boarding_time'])
+            time.sleep(self.config.passenger_boarding_time)
             
             # 9. 扉を閉じる
             self.close_door()
             time.sleep(2)
             
-            logger.info(f"🏁 運転完了: 現在 {target_floor}F, 乗客 {passenger_activity['total_passengers']}人")
+            logger.info("🏁 運転完了: 現在 %dF, 乗客 %d人", target_floor, passenger_activity['total_passengers'])
             
         except Exception as e:
             logger.error(f"❌ 自動運転エラー: {e}")
-            self.current_status['is_moving'] = False
+            self.current_status.is_moving = False
     
     def auto_pilot_loop(self):
         """自動運転ループ"""
         logger.info("🤖 自動運転パイロットを開始します...")
         
-        while self.auto_pilot_enabled and self.running:
+        # 停止要求（無効化・システム停止）は _stop_event に一本化
+        stop_requested = self._stop_event.is_set
+        wait_for_stop = self._stop_event.wait
+        
+        while not stop_requested():
             try:
                 # 自動運転実行
                 self.execute_elevator_operation()
                 
                 # 次の運転まで待機
-                wait_time = self.config['operation_interval'] + random.randint(-3, 3)  # ランダムな待機時間
-                logger.info(f"⏰ 次の運転まで {wait_time}秒待機...")
+                wait_time = self.config.operation_interval + self._rng.randint(-3, 3)  # ランダムな待機時間
+                logger.info("⏰ 次の運転まで %d秒待機...", wait_time)
                 
-                for _ in range(wait_time):
-                    if not self.auto_pilot_enabled or not self.running:
-                        break
-                    time.sleep(1)
+                if wait_for_stop(timeout=wait_time):
+                    break
                 
             except Exception as e:
                 logger.error(f"❌ 自動運転ループエラー: {e}")
-                time.sleep(5)
+                wait_for_stop(timeout=5)
     
     def enable_auto_pilot(self):
         """自動運転パイロットを有効化"""
@@ -382,6 +566,7 @@ class ElevatorAutoPilot:
             self.add_communication_log("system", "自動運転パイロット有効化")
             
             # 自動運転スレッド開始
+            self._stop_event.clear()
             self.auto_pilot_thread = threading.Thread(target=self.auto_pilot_loop, daemon=True)
             self.auto_pilot_thread.start()
     
@@ -389,6 +574,7 @@ class ElevatorAutoPilot:
         """自動運転パイロットを無効化"""
         if self.auto_pilot_enabled:
             self.auto_pilot_enabled = False
+            self._stop_event.set()
             logger.info("🛑 自動運転パイロットを無効にしました")
             self.add_communication_log("system", "自動運転パイロット無効化")
     
@@ -396,10 +582,13 @@ class ElevatorAutoPilot:
         """現在の状態を取得"""
         return {
             'auto_pilot_enabled': self.auto_pilot_enabled,
-            'current_status': self.current_status.copy(),
-            'config': self.config.copy(),
+            'current_status': asdict(self.current_status),
+            'config': asdict(self.config),
             'current_scenario': self.current_scenario.copy(),
-            'communication_logs': self.communication_logs[-10:],  # 最新10件
+            'communication_logs': [
+                self._format_log(entry)
+                for entry in list(self.communication_logs)[-10:]  # 最新10件
+            ],
             'connection_status': 'connected' if (self.serial_conn and self.serial_conn.is_open) else 'disconnected'
         }
     
@@ -409,8 +598,8 @@ class ElevatorAutoPilot:
         
         if self.connect():
             # 初期設定
-            self.set_floor(1)  # 1階からスタート
-            self.set_load(0)   # 初期荷重0
+            self.set_floor(1, flush=False)  # 1階からスタート
+            self.set_load(0)                # 初期荷重0（階数設定とまとめて送信）
             time.sleep(2)
             
             # 自動運転パイロットを有効化
@@ -418,27 +607,87 @@ class ElevatorAutoPilot:
             
             logger.info("🚀 エレベーター自動運転パイロットシステムを開始しました")
             
+            # ログファイルの定期フラッシュ開始（再度 start() されても二重に起動しない）
+            if self._log_flush_thread is None or not self._log_flush_thread.is_alive():
+                self._log_flush_stop.clear()
+                self._log_flush_thread = threading.Thread(target=self._log_flush_loop, daemon=True)
+                self._log_flush_thread.start()
+            
+            # シリアル受信・停止要求・定期状態ログを1つの select で待機
+            sel = selectors.DefaultSelector()
+            sel.register(self.serial_conn.fileno(), selectors.EVENT_READ, "serial")
+            sel.register(self._wake_r, selectors.EVENT_READ, "wake")
+            next_status_time = time.monotonic() + STATUS_LOG_INTERVAL
+            
             try:
                 while self.running:
-                    # 定期的に状態をログ出力
-                    time.sleep(60)  # 1分ごと
-                    status = self.get_status()
-                    logger.info(f"📊 現在の状態: {status['current_status']['current_floor']}F, "
-                              f"乗客数={status['current_status']['passengers']}人, "
-                              f"荷重={status['current_status']['load_weight']}kg, "
-                              f"シナリオ={status['current_scenario']['name']}")
+                    timeout = max(0.0, next_status_time - time.monotonic())
+                    events = sel.select(timeout=timeout)
+                    
+                    if not events:
+                        # 定期的に状態をログ出力
+                        next_status_time += STATUS_LOG_INTERVAL
+                        status = self.get_status()
+                        logger.info(f"📊 現在の状態: {status['current_status']['current_floor']}F, "
+                                  f"乗客数={status['current_status']['passengers']}人, "
+                                  f"荷重={status['current_status']['load_weight']}kg, "
+                                  f"シナリオ={status['current_scenario']['name']}")
+                        continue
+                    
+                    for key, _ in events:
+                        if key.data == "wake":
+                            # 停止要求
+                            os.read(self._wake_r, 64)
+                            self.running = False
+                            break
+                        if not self._drain_serial():
+                            # ポート消失・HUP では fd が読み込み可能のままになるため、
+                            # 監視から外して停止する（select の空回りを防ぐ）
+                            sel.unregister(key.fileobj)
+                            logger.error("❌ シリアルポートが使用できないため自動運転パイロットを停止します")
+                            self.running = False
+                            self.disable_auto_pilot()
+                            self.disconnect()
+                            break
                     
             except KeyboardInterrupt:
                 logger.info("🛑 キーボード割り込みを受信しました")
+            finally:
+                sel.close()
         else:
             logger.error("❌ シリアルポート接続に失敗しました")
     
+    def _drain_serial(self) -> bool:
+        """受信済みの応答をすべて読み出して通信ログに記録（読み出しエラー時は False）"""
+        try:
+            data = self.serial_conn.read(self.serial_conn.in_waiting or 1)
+        except (serial.SerialException, OSError) as e:
+            logger.error(f"❌ シリアル受信エラー: {e}")
+            return False
+        
+        if data:
+            logger.info("📨 受信: %s", data.hex().upper())
+            self.add_communication_log("receive", data.hex().upper())
+        return True
+    
+    def _log_flush_loop(self):
+        """バッファ中のログを一定間隔でファイルへ書き出す"""
+        while not self._log_flush_stop.wait(LOG_FLUSH_INTERVAL):
+            file_log_handler.flush()
+    
     def stop(self):
         """自動運転パイロット停止"""
         self.running = False
+        self._stop_event.set()
+        self._log_flush_stop.set()
+        try:
+            os.write(self._wake_w, b"\0")  # start() の select を起こす
+        except OSError:
+            pass
         self.disable_auto_pilot()
         self.disconnect()
         logger.info("✅ エレベーター自動運転パイロットシステムを停止しました")
+        file_log_handler.flush()
 
 def signal_handler(signum, frame):
     """シグナルハンドラー"""
@@ -7,11 +7,18 @@ Raspberry Pi側：疎通応答→状態確認→制御開始
 
 import serial
 import time
+import array
+import fcntl
+import termios
 import threading
 import logging
+import os
+import selectors
 import signal
+import struct
 import sys
-from datetime import datetime
+from collections import deque
+from dataclasses import dataclass
 from typing import Optional, Dict, Any
 from enum import IntEnum
 
@@ -27,6 +34,41 @@ SERIAL_CONFIG = {
     'timeout': 1
 }
 
+# 1回の受信処理で読み出す最大バイト数
+RX_CHUNK_SIZE = 4096
+
+# serial_struct.flags の ASYNC_LOW_LATENCY（linux/tty_flags.h）
+ASYNC_LOW_LATENCY = 0x2000
+SERIAL_STRUCT_FLAGS_INDEX = 4  # int type, line, port, irq, flags の順
+
+# 受信フレームキュー上限（受信スレッド → 処理スレッド）
+RX_QUEUE_SIZE = 256
+
+# ミッション進行チェック間隔（秒）
+MISSION_TICK_INTERVAL = 1.0
+
+# ハンドシェイク各段階の送信間隔（秒）
+HANDSHAKE_STEP_DELAY = 0.5
+
+# 受信フレーム形式: ENQ(1) 局番号(4) コマンド(1) コマンドコード(4) データ(4) チェックサム(2)
+_FRAME = struct.Struct('>B4sc4s4s2s')
+
+# チェックサム値 → 16進ASCII（2文字）の変換テーブル
+_HEX2 = tuple(b"%02X" % i for i in range(0x100))
+
+# ── ログ用時刻 ─────────────────────────────────
+_hms_cache = (0, "")  # (整数秒, "HH:MM:SS")：1タプルで差し替えるのでスレッド間でも不整合にならない
+
+def _now_hms() -> str:
+    """現在時刻を HH:MM:SS で返す（同じ秒の間は整形済み文字列を再利用）"""
+    global _hms_cache
+    sec = int(time.time())
+    cached_sec, cached_str = _hms_cache
+    if sec != cached_sec:
+        cached_str = time.strftime("%H:%M:%S", time.localtime(sec))
+        _hms_cache = (sec, cached_str)
+    return cached_str
+
 # ── ログ設定 ─────────────────────────────────
 logging.basicConfig(
     level=logging.INFO,
@@ -42,6 +84,15 @@ class CommState(IntEnum):
     DATA_EXCHANGE = 3   # データ交換中
     CONTROL_MODE = 4    # 制御モード
 
+# 通信状態の表示名
+_STATE_NAMES = {
+    CommState.DISCONNECTED: "未接続",
+    CommState.HANDSHAKING: "ハンドシェイク中",
+    CommState.CONNECTED: "接続確立",
+    CommState.DATA_EXCHANGE: "データ交換中",
+    CommState.CONTROL_MODE: "制御モード"
+}
+
 # ── コマンド定義 ─────────────────────────────
 class Commands(IntEnum):
     PING = 0x0000       # 疎通確認
@@ -53,16 +104,41 @@ class Commands(IntEnum):
     FLOOR_CMD = 0x0030  # 階数指令
     DOOR_CMD = 0x0031   # 扉制御
 
+# ── 運転ミッション ─────────────────────────────
+@dataclass
+class Mission:
+    type: str                 # floor / door / wait
+    description: str
+    target: int = 0           # 目標階（floor）
+    action: str = ""          # open / close（door）
+    duration: float = 0.0     # 待機時間（wait）
+    start_time: float = 0.0   # 開始時刻
+
 class AutoPilotHandshake:
     """ハンドシェイク型自動運転装置"""
     
     def __init__(self):
         self.serial_conn: Optional[serial.Serial] = None
         self.station_id = "0001"  # 自動運転装置側
+        self._station_id_bytes = self.station_id.encode('ascii')  # 受信時の宛先比較用
         self.elevator_station = "0002"  # エレベーター側
+        
+        # 送信伝文の固定部分（ENQ + 送信先局番号 + 'W'）とチェックサム対象部分の加算値
+        self._tx_prefix = b"\x05" + self.elevator_station.encode('ascii') + b"W"
+        self._tx_prefix_sum = sum(self._tx_prefix[1:])
+        
+        # PONG 応答は内容が固定なので伝文を事前生成（PING 受信時はそのまま送信）
+        self._pong_frame = self._build_frame(Commands.PONG, 0x0000)
         self.running = False
         self.comm_state = CommState.DISCONNECTED
-        self.lock = threading.Lock()
+        self._stop_event = threading.Event()  # 終了要求（待機中のスレッドを即座に起こす）
+        self._wake_r, self._wake_w = os.pipe()  # 受信スレッドの select を終了時に起こすためのパイプ
+        
+        # 受信フレームキュー（受信スレッドが追加・管理スレッドが取り出す単一生産者/単一消費者）
+        # deque の append / popleft はスレッドセーフなのでロック不要、Event は消費者の起床通知のみ
+        # 状態（通信状態・エレベーター状態・ミッション）を変更するのは管理スレッドのみ
+        self.rx_q = deque(maxlen=RX_QUEUE_SIZE)
+        self._rx_ready = threading.Event()
         
         # エレベーター状態（受信データ）
         self.elevator_floor = 1
@@ -72,9 +148,12 @@ class AutoPilotHandshake:
         
         # 自動運転制御
         self.control_active = False
-        self.mission_queue = []  # 運転ミッション
+        self.mission_queue = deque()  # 運転ミッション（先頭から順に取り出し）
         self.current_mission = None
         self.last_status_time = 0
+        
+        # 表示用の状態スナップショット（管理スレッドが1タプルで差し替え、他スレッドは読むだけ）
+        self._status_snapshot = self._make_status_snapshot()
 
     def initialize(self):
         """初期化"""
@@ -86,6 +165,7 @@ class AutoPilotHandshake:
         try:
             self.serial_conn = serial.Serial(**SERIAL_CONFIG)
             logger.info(f"✅ シリアルポート接続成功")
+            self._set_low_latency()
             
             # 受信スレッド開始
             self.running = True
@@ -96,69 +176,107 @@ class AutoPilotHandshake:
             logger.error(f"❌ 初期化失敗: {e}")
             return False
 
+    def _set_low_latency(self):
+        """ドライバに ASYNC_LOW_LATENCY を設定（USBシリアルの16ms まとめ待ちを解消）"""
+        try:
+            fd = self.serial_conn.fileno()
+            buf = array.array('i', [0] * 32)  # struct serial_struct より大きく確保
+            fcntl.ioctl(fd, termios.TIOCGSERIAL, buf)
+            buf[SERIAL_STRUCT_FLAGS_INDEX] |= ASYNC_LOW_LATENCY
+            fcntl.ioctl(fd, termios.TIOCSSERIAL, buf)
+            logger.info("⚡ ASYNC_LOW_LATENCY を設定しました")
+        except (OSError, AttributeError) as e:
+            # 対応していないドライバ（pty等）・権限不足の場合はそのまま続行
+            logger.warning(f"⚠️ ASYNC_LOW_LATENCY を設定できません: {e}")
+
     def _listen_serial(self):
         """シリアル受信処理"""
         buffer = bytearray()
         
-        while self.running and self.serial_conn and self.serial_conn.is_open:
-            try:
-                if self.serial_conn.in_waiting > 0:
-                    data = self.serial_conn.read(self.serial_conn.in_waiting)
+        # シリアル受信と終了要求を1つの select で待機
+        sel = selectors.DefaultSelector()
+        sel.register(self.serial_conn.fileno(), selectors.EVENT_READ, "serial")
+        sel.register(self._wake_r, selectors.EVENT_READ, "wake")
+        
+        try:
+            while self.running and self.serial_conn.is_open:
+                for key, _ in sel.select():
+                    if key.data == "wake":
+                        # 終了要求
+                        return
+                    
+                    # 受信済みのバイトをまとめて読み出す（1回あたり RX_CHUNK_SIZE まで）
+                    # ※ read(RX_CHUNK_SIZE) を直接呼ぶと POSIX 版 pyserial では timeout まで待ち続けるため使わない
+                    data = self.serial_conn.read(min(self.serial_conn.in_waiting or 1, RX_CHUNK_SIZE))
                     if data:
                         buffer.extend(data)
                         self._process_buffer(buffer)
                 
-                time.sleep(0.05)
-                
-            except Exception as e:
-                logger.error(f"❌ シリアル受信エラー: {e}")
-                break
+        except Exception as e:
+            logger.error(f"❌ シリアル受信エラー: {e}")
+        finally:
+            sel.close()
 
     def _process_buffer(self, buffer: bytearray):
         """バッファ処理"""
-        while len(buffer) >= 16:  # 最小メッセージサイズ
-            if buffer[0] == 0x05:  # ENQ
-                message = buffer[:16]
-                del buffer[:16]
-                self._handle_received_message(message)
-            else:
-                del buffer[0]  # 不正データ破棄
+        while len(buffer) >= 16:  # 最小メッセージサイズ（未満なら続きの受信を待つ）
+            # 完全な1フレームが収まる位置（先頭〜末尾16バイト手前）だけ ENQ を検索
+            stop = len(buffer) - 15
+            idx = buffer.find(0x05, 0, stop)
+            if idx < 0:
+                # 末尾15バイトは次のフレームの先頭かもしれないので残す
+                del buffer[:stop]
+                return
+            if idx:
+                del buffer[:idx]  # 手前の不正データを一括破棄
+            
+            # 1フレーム分を切り出し（スライスは独立したコピーなのでそのまま管理スレッドへ渡せる）
+            message = buffer[:16]
+            
+            # チェックサム検証（局番号〜データ、文字列に変換せず bytes のまま比較）
+            total = sum(message[1:14])  # 13バイト程度ならビュー生成よりスライスの方が速い
+            if _HEX2[((total & 0xFF) + ((total >> 8) & 0xFF)) & 0xFF] != message[14:16]:
+                logger.warning(f"⚠️ チェックサム不一致: {message.hex()}")
+                del buffer[:1]  # 次の ENQ から再同期
+                continue
+            
+            # 管理スレッドへ渡す（受信スレッドでは解析・応答処理を行わない）
+            self.rx_q.append(message)
+            del buffer[:16]
+            self._rx_ready.set()
 
     def _handle_received_message(self, data: bytes):
         """受信メッセージ処理"""
         try:
-            if len(data) < 16 or data[0] != 0x05:
+            if len(data) < _FRAME.size:
                 return
 
-            # メッセージ解析
-            station = data[1:5].decode('ascii')
-            command = chr(data[5])
-            cmd_code_str = data[6:10].decode('ascii')
-            data_value_str = data[10:14].decode('ascii')
-            checksum = data[14:16].decode('ascii')
+            # メッセージ解析（1回のunpackで全フィールドを切り出し）
+            enq, station, command, cmd_code_hex, data_value_hex, checksum = _FRAME.unpack_from(data)
+            if enq != 0x05:  # ENQ
+                return
 
-            # 自分宛かチェック
-            if station != self.station_id:
+            # 自分宛かチェック（デコードせずに bytes のまま比較）
+            if station != self._station_id_bytes:
                 return
 
-            cmd_code = int(cmd_code_str, 16)
-            data_value = int(data_value_str, 16)
+            # 16進ASCIIを整数に変換（int は bytes をそのまま受け付ける）
+            cmd_code = int(cmd_code_hex, 16)
+            data_value = int(data_value_hex, 16)
 
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            logger.info(f"[{timestamp}] 📨 受信: CMD={cmd_code:04X} データ={data_value:04X}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("[%s] 📨 受信: CMD=%04X データ=%04X", _now_hms(), cmd_code, data_value)
 
             # コマンド処理
             if cmd_code == Commands.PING:
-                # PING受信 → PONG応答
+                # PING受信 → PONG応答（事前生成済みの伝文を即座に送信）
+                self._write_frame(self._pong_frame, Commands.PONG, 0x0000)
                 logger.info("🏓 PING受信 → PONG送信")
-                self._send_command(Commands.PONG, 0x0000)
-                with self.lock:
-                    if self.comm_state == CommState.DISCONNECTED:
-                        self.comm_state = CommState.HANDSHAKING
-                        logger.info("🤝 ハンドシェイク開始")
-                        # 状態要求を送信
-                        time.sleep(0.5)
-                        self._send_command(Commands.STATUS_REQ, 0x0000)
+                if self.comm_state == CommState.DISCONNECTED:
+                    self.comm_state = CommState.HANDSHAKING
+                    logger.info("🤝 ハンドシェイク開始")
+                    # 状態要求を送信（受信処理は止めずにタイマーで遅延送信）
+                    self._send_later(Commands.STATUS_REQ, 0x0000)
 
             elif cmd_code == Commands.PONG:
                 # PONG受信
@@ -168,29 +286,26 @@ class AutoPilotHandshake:
                 # 状態応答受信
                 floor = (data_value >> 8) & 0xFF
                 load = data_value & 0xFF
-                logger.info(f"📊 状態受信: {floor}F, 荷重{load}kg")
+                logger.info("📊 状態受信: %dF, 荷重%dkg", floor, load)
                 
-                with self.lock:
-                    self.elevator_floor = floor
-                    self.elevator_load = load
-                    self.last_status_time = time.time()
-                    
-                    if self.comm_state == CommState.HANDSHAKING:
-                        self.comm_state = CommState.CONNECTED
-                        logger.info("✅ 通信確立完了")
-                        # 制御要求を送信
-                        time.sleep(0.5)
-                        self._send_command(Commands.CONTROL_REQ, 0x0000)
+                self.elevator_floor = floor
+                self.elevator_load = load
+                self.last_status_time = time.time()
+                
+                if self.comm_state == CommState.HANDSHAKING:
+                    self.comm_state = CommState.CONNECTED
+                    logger.info("✅ 通信確立完了")
+                    # 制御要求を送信（受信処理は止めずにタイマーで遅延送信）
+                    self._send_later(Commands.CONTROL_REQ, 0x0000)
 
             elif cmd_code == Commands.CONTROL_ACK:
                 # 制御確認受信
                 logger.info("🎮 制御確認受信")
-                with self.lock:
-                    self.comm_state = CommState.CONTROL_MODE
-                    self.control_active = True
-                    logger.info("🚀 自動運転制御開始")
-                    # デモミッション追加
-                    self._add_demo_missions()
+                self.comm_state = CommState.CONTROL_MODE
+                self.control_active = True
+                logger.info("🚀 自動運転制御開始")
+                # デモミッション追加
+                self._add_demo_missions()
 
         except Exception as e:
             logger.error(f"❌ メッセージ処理エラー: {e}")
@@ -198,52 +313,50 @@ class AutoPilotHandshake:
     def _add_demo_missions(self):
         """デモミッション追加"""
         demo_missions = [
-            {"type": "floor", "target": 3, "description": "3Fへ移動"},
-            {"type": "door", "action": "open", "description": "扉開放"},
-            {"type": "wait", "duration": 3, "description": "3秒待機"},
-            {"type": "door", "action": "close", "description": "扉閉鎖"},
-            {"type": "floor", "target": 1, "description": "1Fへ移動"},
-            {"type": "door", "action": "open", "description": "扉開放"},
-            {"type": "wait", "duration": 2, "description": "2秒待機"},
-            {"type": "door", "action": "close", "description": "扉閉鎖"},
+            Mission("floor", "3Fへ移動", target=3),
+            Mission("door", "扉開放", action="open"),
+            Mission("wait", "3秒待機", duration=3),
+            Mission("door", "扉閉鎖", action="close"),
+            Mission("floor", "1Fへ移動", target=1),
+            Mission("door", "扉開放", action="open"),
+            Mission("wait", "2秒待機", duration=2),
+            Mission("door", "扉閉鎖", action="close"),
         ]
         
-        with self.lock:
-            self.mission_queue.extend(demo_missions)
-            logger.info(f"📋 デモミッション追加: {len(demo_missions)}件")
+        self.mission_queue.extend(demo_missions)
+        logger.info(f"📋 デモミッション追加: {len(demo_missions)}件")
 
-    def _calculate_checksum(self, data: bytes) -> str:
-        """チェックサム計算"""
-        total = sum(data)
+    def _calculate_checksum(self, data: bytes, initial: int = 0) -> bytes:
+        """チェックサム計算（16進ASCII 2文字を返す、initial に加算済みの固定部分の合計を渡せる）"""
+        total = initial + sum(data)
         lower_byte = total & 0xFF
         upper_byte = (total >> 8) & 0xFF
-        checksum = (lower_byte + upper_byte) & 0xFF
-        return f"{checksum:02X}"
+        return _HEX2[(lower_byte + upper_byte) & 0xFF]
+
+    def _build_frame(self, cmd_code: int, data_value: int) -> bytes:
+        """送信伝文を生成"""
+        # メッセージ作成（固定部分は事前生成済み、コマンド・データのみ変換）
+        payload = b"%04X%04X" % (cmd_code, data_value)
+        
+        # チェックサム（固定部分の合計は事前計算済み）
+        checksum = self._calculate_checksum(payload, self._tx_prefix_sum)
+        
+        return self._tx_prefix + payload + checksum
 
     def _send_command(self, cmd_code: int, data_value: int) -> bool:
         """コマンド送信"""
+        return self._write_frame(self._build_frame(cmd_code, data_value), cmd_code, data_value)
+
+    def _write_frame(self, frame: bytes, cmd_code: int, data_value: int) -> bool:
+        """生成済みの伝文を送信"""
         if not self.serial_conn or not self.serial_conn.is_open:
             return False
 
         try:
-            # メッセージ作成
-            message = bytearray()
-            message.append(0x05)  # ENQ
-            message.extend(self.elevator_station.encode('ascii'))  # 送信先
-            message.append(0x57)  # 'W'
-            message.extend(f"{cmd_code:04X}".encode('ascii'))
-            message.extend(f"{data_value:04X}".encode('ascii'))
-            
-            # チェックサム
-            checksum_data = message[1:]
-            checksum = self._calculate_checksum(checksum_data)
-            message.extend(checksum.encode('ascii'))
-
-            # 送信
-            self.serial_conn.write(message)
+            self.serial_conn.write(frame)
             
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            logger.info(f"[{timestamp}] 📤 送信: CMD={cmd_code:04X} データ={data_value:04X}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("[%s] 📤 送信: CMD=%04X データ=%04X", _now_hms(), cmd_code, data_value)
             
             return True
 
@@ -251,6 +364,12 @@ class AutoPilotHandshake:
             logger.error(f"❌ コマンド送信エラー: {e}")
             return False
 
+    def _send_later(self, cmd_code: int, data_value: int, delay: float = HANDSHAKE_STEP_DELAY):
+        """指定秒数後にコマンド送信"""
+        timer = threading.Timer(delay, self._send_command, args=(cmd_code, data_value))
+        timer.daemon = True
+        timer.start()
+
     def start_communication(self):
         """通信開始"""
         logger.info("🚀 ハンドシェイク型通信開始")
@@ -263,111 +382,142 @@ class AutoPilotHandshake:
         threading.Thread(target=self._auto_pilot_manager, daemon=True).start()
 
     def _auto_pilot_manager(self):
-        """自動運転管理"""
+        """自動運転管理（受信フレーム処理とミッション実行を1スレッドで行い、状態を単独で所有）"""
+        rx_q = self.rx_q
+        rx_ready = self._rx_ready
+        next_tick = time.monotonic()
+        
         while self.running:
             try:
-                with self.lock:
-                    state = self.comm_state
-                    active = self.control_active
+                # 受信通知かミッション周期まで待機
+                rx_ready.wait(timeout=max(0.0, next_tick - time.monotonic()))
+                rx_ready.clear()  # 取り出し前にクリア（以降の追加は再度通知される）
+                
+                while True:
+                    try:
+                        message = rx_q.popleft()
+                    except IndexError:
+                        break
+                    self._handle_received_message(message)
                 
-                if state == CommState.CONTROL_MODE and active:
-                    # ミッション実行
-                    self._execute_missions()
+                now = time.monotonic()
+                if now >= next_tick:
+                    next_tick = now + MISSION_TICK_INTERVAL
+                    if self.comm_state == CommState.CONTROL_MODE and self.control_active:
+                        # ミッション実行
+                        self._execute_missions()
                 
-                time.sleep(1)
+                self._status_snapshot = self._make_status_snapshot()
                 
             except Exception as e:
                 logger.error(f"❌ 自動運転管理エラー: {e}")
 
     def _execute_missions(self):
         """ミッション実行"""
-        with self.lock:
-            if self.current_mission is None and self.mission_queue:
-                # 次のミッション開始
-                self.current_mission = self.mission_queue.pop(0)
-                mission = self.current_mission
-                
-                logger.info(f"🎯 ミッション開始: {mission['description']}")
-                
-                if mission["type"] == "floor":
-                    # 階数指令
-                    target = mission["target"]
-                    self._send_command(Commands.FLOOR_CMD, target)
-                    mission["start_time"] = time.time()
-                    
-                elif mission["type"] == "door":
-                    # 扉制御
-                    action = mission["action"]
-                    cmd_value = 0x0001 if action == "open" else 0x0002
-                    self._send_command(Commands.DOOR_CMD, cmd_value)
-                    mission["start_time"] = time.time()
-                    
-                elif mission["type"] == "wait":
-                    # 待機
-                    mission["start_time"] = time.time()
+        if self.current_mission is None and self.mission_queue:
+            # 次のミッション開始
+            self.current_mission = self.mission_queue.popleft()
+            mission = self.current_mission
             
-            elif self.current_mission is not None:
-                # 現在のミッション進行チェック
-                mission = self.current_mission
-                elapsed = time.time() - mission["start_time"]
-                
-                if mission["type"] == "floor":
-                    # 移動完了チェック（5秒タイムアウト）
-                    if elapsed > 5.0:
-                        logger.info(f"✅ ミッション完了: {mission['description']}")
-                        self.current_mission = None
-                        
-                elif mission["type"] == "door":
-                    # 扉動作完了チェック（2秒タイムアウト）
-                    if elapsed > 2.0:
-                        logger.info(f"✅ ミッション完了: {mission['description']}")
-                        self.current_mission = None
-                        
-                elif mission["type"] == "wait":
-                    # 待機時間チェック
-                    if elapsed >= mission["duration"]:
-                        logger.info(f"✅ ミッション完了: {mission['description']}")
-                        self.current_mission = None
+            logger.info("🎯 ミッション開始: %s", mission.description)
+            
+            if mission.type == "floor":
+                # 階数指令
+                target = mission.target
+                self._send_command(Commands.FLOOR_CMD, target)
+                mission.start_time = time.time()
+            
+            elif mission.type == "door":
+                # 扉制御
+                action = mission.action
+                cmd_value = 0x0001 if action == "open" else 0x0002
+                self._send_command(Commands.DOOR_CMD, cmd_value)
+                mission.start_time = time.time()
+            
+            elif mission.type == "wait":
+                # 待機
+                mission.start_time = time.time()
+        
+        elif self.current_mission is not None:
+            # 現在のミッション進行チェック
+            mission = self.current_mission
+            elapsed = time.time() - mission.start_time
+            
+            if mission.type == "floor":
+                # 移動完了チェック（5秒タイムアウト）
+                if elapsed > 5.0:
+                    logger.info("✅ ミッション完了: %s", mission.description)
+                    self.current_mission = None
+            
+            elif mission.type == "door":
+                # 扉動作完了チェック（2秒タイムアウト）
+                if elapsed > 2.0:
+                    logger.info("✅ ミッション完了: %s", mission.description)
+                    self.current_mission = None
+            
+            elif mission.type == "wait":
+                # 待機時間チェック
+                if elapsed >= mission.duration:
+                    logger.info("✅ ミッション完了: %s", mission.description)
+                    self.current_mission = None
+
+    def _make_status_snapshot(self) -> tuple:
+        """表示用の状態スナップショットを生成（管理スレッドから呼ぶ）"""
+        current_mission = self.current_mission
+        return (
+            self.comm_state,
+            self.control_active,
+            self.elevator_floor,
+            self.elevator_load,
+            current_mission.description if current_mission else "-",
+            len(self.mission_queue),
+        )
 
     def _display_status(self):
         """状態表示"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        if not logger.isEnabledFor(logging.INFO):
+            return
         
-        with self.lock:
-            state_names = {
-                CommState.DISCONNECTED: "未接続",
-                CommState.HANDSHAKING: "ハンドシェイク中",
-                CommState.CONNECTED: "接続確立",
-                CommState.DATA_EXCHANGE: "データ交換中",
-                CommState.CONTROL_MODE: "制御モード"
-            }
-            
-            state_name = state_names.get(self.comm_state, "不明")
-            control_status = "有効" if self.control_active else "無効"
-            mission_count = len(self.mission_queue)
-            current_desc = self.current_mission["description"] if self.current_mission else "-"
-
-        logger.info(f"\n[{timestamp}] 🤖 自動運転装置状態")
-        logger.info(f"通信状態: {state_name}")
-        logger.info(f"制御状態: {control_status}")
-        logger.info(f"エレベーター階: {self.elevator_floor}F")
-        logger.info(f"エレベーター荷重: {self.elevator_load}kg")
-        logger.info(f"現在ミッション: {current_desc}")
-        logger.info(f"待機ミッション: {mission_count}件")
+        timestamp = _now_hms()
+        
+        # 管理スレッドが公開したスナップショットを1回だけ読む（ロック不要で一貫した値）
+        comm_state, control_active, elevator_floor, elevator_load, current_desc, mission_count = self._status_snapshot
+        state_name = _STATE_NAMES.get(comm_state, "不明")
+        control_status = "有効" if control_active else "無効"
+
+        logger.info("\n[%s] 🤖 自動運転装置状態", timestamp)
+        logger.info("通信状態: %s", state_name)
+        logger.info("制御状態: %s", control_status)
+        logger.info("エレベーター階: %dF", elevator_floor)
+        logger.info("エレベーター荷重: %dkg", elevator_load)
+        logger.info("現在ミッション: %s", current_desc)
+        logger.info("待機ミッション: %d件", mission_count)
 
     def start_status_display(self):
         """定期状態表示開始"""
-        def _status_timer():
-            if self.running:
-                self._display_status()
-                threading.Timer(10.0, _status_timer).start()
+        threading.Thread(target=self._status_loop, daemon=True).start()
 
-        _status_timer()
+    def _status_loop(self):
+        """定期状態表示（10秒ごと、終了要求で即座に停止）"""
+        while self.running:
+            try:
+                self._display_status()
+            except Exception as e:
+                logger.error(f"❌ 状態表示エラー: {e}")
+            
+            if self._stop_event.wait(10.0):
+                break
 
     def shutdown(self):
         """終了処理"""
         logger.info("🛑 システム終了中...")
         self.running = False
+        self._stop_event.set()
+        self._rx_ready.set()
+        try:
+            os.write(self._wake_w, b"\0")  # 受信スレッドの select を起こす
+        except OSError:
+            pass
         if self.serial_conn and self.serial_conn.is_open:
             self.serial_conn.close()
         logger.info("✅ システム終了完了")
@@ -7,21 +7,27 @@ SEC-3000H Auto Pilot Receiver (Fixed Version)
 """
 
 import serial
+import array
+import fcntl
+import termios
 import time
 import threading
 import logging
 import signal
 import sys
 import socket
+import struct
 from datetime import datetime
 from typing import Optional, Dict, Any
 from enum import IntEnum
 
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 import gi
 gi.require_version('Gst', '1.0')
 gi.require_version('GstRtspServer', '1.0')
-from gi.repository import Gst, GstRtspServer, GLib
+gi.require_version('GstVideo', '1.0')
+from gi.repository import Gst, GstRtspServer, GstVideo, GLib
 
 # ── 設定 ───────────────────────────────────
 SERIAL_PORT = "/dev/ttyUSB0"  # Raspberry Pi の場合
@@ -38,8 +44,38 @@ SERIAL_CONFIG = {
 
 # RTSP設定
 WIDTH, HEIGHT, FPS = 640, 360, 15
+FRAME_SIZE = WIDTH * HEIGHT * 3 // 2  # I420 1フレームのバイト数（Y + U/4 + V/4）
+BUFFER_POOL_MIN, BUFFER_POOL_MAX = 4, 8  # フレームバッファプールの保持数
+BBOX_CACHE_SIZE = 100  # 中央寄せ位置キャッシュの上限
+TILE_CACHE_SIZE = 64  # 描画済み矩形（RGB + I420）キャッシュの上限
+FLOOR_LABELS = ("B1F",) + tuple(f"{n}F" for n in range(1, 10))  # 事前描画する階表示
+KEYFRAME_INTERVAL = 2  # キーフレーム間隔（秒）：途中参加のクライアントがこの時間内に映像を得られる
+RTP_UDP_BUFFER_SIZE = 512 * 1024  # RTP送信用UDPソケットバッファ（net.core.wmem_max 以下に制限される）
 FONT_PATH = "/usr/share/fonts/truetype/ipafont-mincho/ipam.ttf"
 
+# serial_struct.flags の ASYNC_LOW_LATENCY（linux/tty_flags.h）
+ASYNC_LOW_LATENCY = 0x2000
+SERIAL_STRUCT_FLAGS_INDEX = 4  # int type, line, port, irq, flags の順
+
+# ENQ(1) + 局番号(4) + CMD(1) + データ番号(4) + データ値(4) + チェックサム(2)
+_FRAME = struct.Struct('>B4sc4s4s2s')
+
+# チェックサム値 → 16進ASCII（2文字）の変換テーブル
+_HEX2 = tuple(b"%02X" % i for i in range(0x100))
+
+# ── ログ用時刻 ─────────────────────────────────
+_timestamp_cache = (0, "")  # (整数秒, 整形済み文字列)：1タプルで差し替えるのでスレッド間でも不整合にならない
+
+def _now_timestamp() -> str:
+    """現在時刻を「YYYY年MM月DD日 HH:MM:SS」で返す（同じ秒の間は整形済み文字列を再利用）"""
+    global _timestamp_cache
+    sec = int(time.time())
+    cached_sec, cached_str = _timestamp_cache
+    if sec != cached_sec:
+        cached_str = time.strftime("%Y年%m月%d日 %H:%M:%S", time.localtime(sec))
+        _timestamp_cache = (sec, cached_str)
+    return cached_str
+
 # ── ログ設定 ─────────────────────────────────
 logging.basicConfig(
     level=logging.INFO,
@@ -69,6 +105,7 @@ class ElevatorStatus:
         self.load_weight = 0
         self.last_update = None
         self.communication_active = False
+        self.version = 0  # 受信のたびに加算（映像側の変化検出用）
 
 class AutoPilotReceiver:
     """SEC-3000H 自動運転装置受信機"""
@@ -78,10 +115,30 @@ class AutoPilotReceiver:
         self.status = ElevatorStatus()
         self.station_id = "0001"  # 自動運転装置側局番号
         self.elevator_station = "0002"  # エレベーター側局番号
+        self._station_id_bytes = self.station_id.encode('ascii')
+        # ACK応答は内容が固定なので一度だけ生成
+        self._ack_frame = b'\x06' + self.elevator_station.encode('ascii')  # ACK + 0002
+        self._ack_hex = self._ack_frame.hex().upper()
+        # 送信伝文バッファ（ENQ + 送信先局番号 + 'W' は固定なので先に書いておく）
+        self._tx_buf = bytearray(_FRAME.size)
+        self._tx_buf[0:6] = b'\x05' + self.elevator_station.encode('ascii') + b'W'
         self.running = False
-        self.lock = threading.Lock()
+        self.status_snapshot = self._make_status_snapshot()
+        self._stop_event = threading.Event()
         self.local_ip = self._get_local_ip()
 
+    def _make_status_snapshot(self) -> tuple:
+        """表示用の状態スナップショットを生成（受信スレッドから呼ぶ）"""
+        status = self.status
+        return (
+            status.version,
+            status.current_floor,
+            status.target_floor,
+            status.load_weight,
+            status.last_update,
+            status.communication_active,
+        )
+
     def _get_local_ip(self) -> str:
         """ローカルIPアドレスを取得"""
         try:
@@ -113,132 +170,139 @@ class AutoPilotReceiver:
         try:
             self.serial_conn = serial.Serial(**SERIAL_CONFIG)
             logger.info(f"✅ シリアルポート {SERIAL_PORT} 接続成功")
-            
-            # 受信スレッド開始
-            threading.Thread(target=self._listen_serial, daemon=True).start()
+            self._set_low_latency()
             
         except Exception as e:
             logger.error(f"❌ シリアルポートエラー: {e}")
             raise
 
+    def _set_low_latency(self):
+        """ドライバに ASYNC_LOW_LATENCY を設定（USBシリアルの16ms まとめ待ちを解消）"""
+        try:
+            fd = self.serial_conn.fileno()
+            buf = array.array('i', [0] * 32)  # struct serial_struct より大きく確保
+            fcntl.ioctl(fd, termios.TIOCGSERIAL, buf)
+            buf[SERIAL_STRUCT_FLAGS_INDEX] |= ASYNC_LOW_LATENCY
+            fcntl.ioctl(fd, termios.TIOCSSERIAL, buf)
+            logger.info("⚡ ASYNC_LOW_LATENCY を設定しました")
+        except (OSError, AttributeError) as e:
+            # 対応していないドライバ（pty等）・権限不足の場合はそのまま続行
+            logger.warning(f"⚠️ ASYNC_LOW_LATENCY を設定できません: {e}")
+
     def _listen_serial(self):
-        """シリアル受信処理（エレベーターからのデータ受信）"""
-        buffer = bytearray()
-        
-        while self.running and self.serial_conn and self.serial_conn.is_open:
+        """シリアル受信処理（エレベーターからのデータ受信）
+
+        ENQ(05H) まで読み進め、続く15バイトをまとめて読むだけの状態機械。
+        1メッセージあたり2回の読み出しで済み、バッファの検索・詰め直しは行わない。
+        """
+        serial_conn = self.serial_conn
+        body_size = _FRAME.size - 1
+
+        while self.running and serial_conn.is_open:
             try:
-                if self.serial_conn.in_waiting > 0:
-                    data = self.serial_conn.read(self.serial_conn.in_waiting)
-                    if data:
-                        # デバッグログ
-                        hex_data = data.hex().upper()
-                        logger.info(f"🔍 受信データ: {hex_data} ({len(data)}バイト)")
-                        buffer.extend(data)
-                    
-                    # ENQ(05H)で始まるメッセージを検索
-                    while len(buffer) >= 16:
-                        enq_pos = buffer.find(0x05)
-                        if enq_pos == -1:
-                            # ENQが見つからない場合、バッファをクリア
-                            if len(buffer) > 0:
-                                logger.warning(f"⚠️ ENQなしデータ破棄: {buffer.hex().upper()}")
-                            buffer.clear()
-                            break
-                        
-                        if enq_pos > 0:
-                            # ENQ前のデータを破棄
-                            discarded = buffer[:enq_pos]
-                            logger.warning(f"⚠️ ENQ前データ破棄: {discarded.hex().upper()}")
-                            buffer = buffer[enq_pos:]
-                        
-                        if len(buffer) >= 16:
-                            message = buffer[:16]
-                            buffer = buffer[16:]
-                            # デバッグログ
-                            hex_msg = message.hex().upper()
-                            logger.info(f"📦 メッセージ処理: {hex_msg}")
-                            self._handle_received_data(message)
-                        else:
-                            break
-                
-                time.sleep(0.05)
+                # ENQ が届くまでブロック（timeout ごとに停止要求を確認）
+                head = serial_conn.read_until(b'\x05')
+                if not head:
+                    continue
+                if head[-1] != 0x05:
+                    # timeout までに ENQ が来なかった
+                    logger.warning("⚠️ ENQなしデータ破棄: %s", head.hex().upper())
+                    continue
+                if len(head) > 1:
+                    # ENQ前のデータを破棄
+                    logger.warning("⚠️ ENQ前データ破棄: %s", head[:-1].hex().upper())
+
+                body = serial_conn.read(body_size)
+                if len(body) < body_size:
+                    logger.warning("⚠️ 不完全メッセージ破棄: 05%s", body.hex().upper())
+                    continue
+
+                message = b'\x05' + body
+                # デバッグログ
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("📦 メッセージ処理: %s", message.hex().upper())
+                self._handle_received_data(message)
                 
             except Exception as e:
-                logger.error(f"❌ シリアル受信エラー: {e}")
+                logger.error("❌ シリアル受信エラー: %s", e)
                 break
 
     def _handle_received_data(self, data: bytes):
         """受信データ処理（エレベーターからの状態データ）"""
         try:
-            if len(data) < 16 or data[0] != 0x05:
-                logger.warning(f"⚠️ 無効なメッセージ: {data.hex().upper()}")
+            if len(data) < _FRAME.size or data[0] != 0x05:
+                logger.warning("⚠️ 無効なメッセージ: %s", data.hex().upper())
                 return
 
-            # メッセージ解析
-            try:
-                station = data[1:5].decode('ascii')
-                command = chr(data[5])
-                data_num_str = data[6:10].decode('ascii')
-                data_value_str = data[10:14].decode('ascii')
-                checksum = data[14:16].decode('ascii')
-            except UnicodeDecodeError as e:
-                logger.error(f"❌ デコードエラー: {e}, データ: {data.hex().upper()}")
-                return
+            # メッセージ解析（各フィールドは bytes のまま扱い、文字列化はログ出力時のみ）
+            _, station, command, data_num_hex, data_value_hex, checksum_hex = _FRAME.unpack_from(data)
+            log_info = logger.isEnabledFor(logging.INFO)
 
-            logger.info(f"🔍 解析結果: 局番号={station}, CMD={command}, データ番号={data_num_str}, データ値={data_value_str}, チェックサム={checksum}")
+            if log_info:
+                logger.info(
+                    "🔍 解析結果: 局番号=%s, CMD=%s, データ番号=%s, データ値=%s, チェックサム=%s",
+                    station.decode('ascii', 'replace'), command.decode('ascii', 'replace'),
+                    data_num_hex.decode('ascii', 'replace'), data_value_hex.decode('ascii', 'replace'),
+                    checksum_hex.decode('ascii', 'replace')
+                )
 
             # 自分宛のメッセージかチェック
-            if station != self.station_id:
-                logger.info(f"ℹ️ 他局宛メッセージ: {station} (自分: {self.station_id})")
+            if station != self._station_id_bytes:
+                if log_info:
+                    logger.info("ℹ️ 他局宛メッセージ: %s (自分: %s)",
+                                station.decode('ascii', 'replace'), self.station_id)
                 return
 
             try:
-                data_num = int(data_num_str, 16)
-                data_value = int(data_value_str, 16)
+                data_num = int(data_num_hex, 16)
+                data_value = int(data_value_hex, 16)
             except ValueError as e:
-                logger.error(f"❌ 数値変換エラー: {e}, データ番号={data_num_str}, データ値={data_value_str}")
+                logger.error("❌ 数値変換エラー: %s, データ番号=%r, データ値=%r", e, data_num_hex, data_value_hex)
                 return
 
-            timestamp = datetime.now().strftime("%Y年%m月%d日 %H:%M:%S")
-
-            # データ処理
-            with self.lock:
-                self.status.last_update = datetime.now()
-                self.status.communication_active = True
-
-                if data_num == DataNumbers.CURRENT_FLOOR:
-                    # 現在階数
-                    current_floor = "B1F" if data_value == 0xFFFF else f"{data_value}F"
-                    self.status.current_floor = current_floor
-                    description = f"現在階数: {current_floor}"
-                    
-                elif data_num == DataNumbers.TARGET_FLOOR:
-                    # 行先階
-                    if data_value == 0x0000:
-                        self.status.target_floor = None
-                        description = "行先階: なし"
-                    else:
-                        target_floor = "B1F" if data_value == 0xFFFF else f"{data_value}F"
-                        self.status.target_floor = target_floor
-                        description = f"行先階: {target_floor}"
-                    
-                elif data_num == DataNumbers.LOAD_WEIGHT:
-                    # 荷重
-                    self.status.load_weight = data_value
-                    description = f"荷重: {data_value}kg"
+            # データ処理（書き込みはこの受信スレッドのみ）
+            self.status.last_update = datetime.now()
+            self.status.communication_active = True
+            self.status.version += 1
+
+            if data_num == DataNumbers.CURRENT_FLOOR:
+                # 現在階数
+                current_floor = "B1F" if data_value == 0xFFFF else f"{data_value}F"
+                self.status.current_floor = current_floor
+                description = f"現在階数: {current_floor}"
+                
+            elif data_num == DataNumbers.TARGET_FLOOR:
+                # 行先階
+                if data_value == 0x0000:
+                    self.status.target_floor = None
+                    description = "行先階: なし"
                 else:
-                    description = f"データ番号: {data_num:04X}"
+                    target_floor = "B1F" if data_value == 0xFFFF else f"{data_value}F"
+                    self.status.target_floor = target_floor
+                    description = f"行先階: {target_floor}"
+                
+            elif data_num == DataNumbers.LOAD_WEIGHT:
+                # 荷重
+                self.status.load_weight = data_value
+                description = f"荷重: {data_value}kg"
+            else:
+                description = f"データ番号: {data_num:04X}"
 
-            logger.info(
-                f"[{timestamp}] 📨 受信: ENQ(05) 局番号:{self.elevator_station} CMD:{command} "
-                f"{description} データ:{data_value_str} チェックサム:{checksum}"
-            )
+            # 読み手（映像・状態表示）へは不変タプルの差し替えで公開する
+            self.status_snapshot = self._make_status_snapshot()
+
+            if log_info:
+                logger.info(
+                    "[%s] 📨 受信: ENQ(05) 局番号:%s CMD:%s %s データ:%s チェックサム:%s",
+                    _now_timestamp(), self.elevator_station, command.decode('ascii', 'replace'),
+                    description, data_value_hex.decode('ascii'), checksum_hex.decode('ascii', 'replace')
+                )
 
             # ACK応答送信
             self._send_ack_response()
 
         except Exception as e:
-            logger.error(f"❌ 受信データ処理エラー: {e}, データ: {data.hex().upper()}")
+            logger.error("❌ 受信データ処理エラー: %s, データ: %s", e, data.hex().upper())
 
     def _send_ack_response(self):
         """ACK応答送信"""
@@ -246,25 +310,20 @@ class AutoPilotReceiver:
             return
 
         try:
-            response = bytearray([0x06])  # ACK
-            response.extend(self.elevator_station.encode('ascii'))  # 0002
+            self.serial_conn.write(self._ack_frame)
 
-            self.serial_conn.write(response)
-
-            timestamp = datetime.now().strftime("%Y年%m月%d日 %H:%M:%S")
-            hex_data = response.hex().upper()
-            logger.info(f"[{timestamp}] 📤 ACK送信: {hex_data}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("[%s] 📤 ACK送信: %s", _now_timestamp(), self._ack_hex)
 
         except Exception as e:
-            logger.error(f"❌ ACK送信エラー: {e}")
+            logger.error("❌ ACK送信エラー: %s", e)
 
-    def _calculate_checksum(self, data: bytes) -> str:
-        """チェックサム計算"""
+    def _calculate_checksum(self, data) -> bytes:
+        """チェックサム計算（bytes / bytearray / memoryview を受け付け、16進ASCII 2文字を返す）"""
         total = sum(data)
         lower_byte = total & 0xFF
         upper_byte = (total >> 8) & 0xFF
-        checksum = (lower_byte + upper_byte) & 0xFF
-        return f"{checksum:02X}"
+        return _HEX2[(lower_byte + upper_byte) & 0xFF]
 
     def send_command(self, data_num: int, data_value: int) -> bool:
         """コマンド送信（エレベーターへの指令）"""
@@ -272,30 +331,25 @@ class AutoPilotReceiver:
             return False
 
         try:
-            # メッセージ作成
-            message = bytearray()
-            message.append(0x05)  # ENQ
-            message.extend(self.elevator_station.encode('ascii'))  # 0002（送信先）
-            message.append(0x57)  # 'W'
-
-            # データ番号 (4桁ASCII)
-            data_num_str = f"{data_num:04X}"
-            message.extend(data_num_str.encode('ascii'))
+            if not (0 <= data_num <= 0xFFFF and 0 <= data_value <= 0xFFFF):
+                raise ValueError(f"範囲外の値: データ番号={data_num}, データ={data_value}")
 
-            # データ (4桁HEX ASCII)
-            data_value_str = f"{data_value:04X}"
-            message.extend(data_value_str.encode('ascii'))
+            # メッセージ作成（固定部分は書き込み済みのバッファに可変部分だけ上書き）
+            message = self._tx_buf
+            message[6:10] = b"%04X" % data_num     # データ番号 (4桁ASCII)
+            message[10:14] = b"%04X" % data_value  # データ (4桁HEX ASCII)
 
             # チェックサム計算 (ENQ以外)
-            checksum_data = message[1:]
-            checksum = self._calculate_checksum(checksum_data)
-            message.extend(checksum.encode('ascii'))
+            # 13バイト程度なら memoryview を作るよりスライスの方が速い
+            checksum = self._calculate_checksum(message[1:14])
+            message[14:16] = checksum
 
             # 送信
             self.serial_conn.write(message)
 
-            timestamp = datetime.now().strftime("%Y年%m月%d日 %H:%M:%S")
-            
+            if not logger.isEnabledFor(logging.INFO):
+                return True
+
             # データ内容を解釈
             description = ""
             if data_num == DataNumbers.FLOOR_SETTING:
@@ -310,14 +364,15 @@ class AutoPilotReceiver:
                     description = "扉制御: 停止"
 
             logger.info(
-                f"[{timestamp}] 📤 送信: ENQ(05) 局番号:{self.elevator_station} CMD:W "
-                f"{description} データ:{data_value_str} チェックサム:{checksum}"
+                "[%s] 📤 送信: ENQ(05) 局番号:%s CMD:W %s データ:%04X チェックサム:%s",
+                _now_timestamp(), self.elevator_station, description,
+                data_value, checksum.decode('ascii')
             )
 
             return True
 
         except Exception as e:
-            logger.error(f"❌ コマンド送信エラー: {e}")
+            logger.error("❌ コマンド送信エラー: %s", e)
             return False
 
     def set_floor(self, floor: str) -> bool:
@@ -344,22 +399,26 @@ class AutoPilotReceiver:
         logger.info("🎧 エレベーターデータ受信開始")
         logger.info(f"📊 受信データ: 現在階数(0001), 行先階(0002), 荷重(0003)")
         self.running = True
+        self._stop_event.clear()
+
+        # 受信スレッド開始（running を立ててから起動しないと即終了する）
+        threading.Thread(target=self._listen_serial, daemon=True).start()
 
     def stop_receiver(self):
         """受信停止"""
         logger.info("🛑 データ受信停止")
         self.running = False
+        self._stop_event.set()
 
     def _display_status(self):
         """状態表示"""
-        timestamp = datetime.now().strftime("%Y年%m月%d日 %H:%M:%S")
+        if not logger.isEnabledFor(logging.INFO):
+            return
 
-        with self.lock:
-            current_floor = self.status.current_floor
-            target_floor = self.status.target_floor or "-"
-            load_weight = self.status.load_weight
-            last_update = self.status.last_update
-            communication_active = self.status.communication_active
+        timestamp = _now_timestamp()
+
+        _, current_floor, target_floor, load_weight, last_update, communication_active = self.status_snapshot
+        target_floor = target_floor or "-"
 
         # 通信状態チェック
         if last_update:
@@ -368,22 +427,24 @@ class AutoPilotReceiver:
         else:
             comm_status = "未受信"
 
-        logger.info(f"\n[{timestamp}] 📊 エレベーター状態")
-        logger.info(f"現在階: {current_floor}")
-        logger.info(f"行先階: {target_floor}")
-        logger.info(f"荷重: {load_weight}kg")
-        logger.info(f"通信状態: {comm_status}")
+        logger.info("\n[%s] 📊 エレベーター状態", timestamp)
+        logger.info("現在階: %s", current_floor)
+        logger.info("行先階: %s", target_floor)
+        logger.info("荷重: %skg", load_weight)
+        logger.info("通信状態: %s", comm_status)
         if last_update:
-            logger.info(f"最終更新: {last_update.strftime('%H:%M:%S')}")
+            logger.info("最終更新: %s", last_update.strftime('%H:%M:%S'))
 
     def start_status_display(self):
         """定期状態表示開始"""
-        def _status_timer():
-            if self.running:
-                self._display_status()
-                threading.Timer(30.0, _status_timer).start()
+        threading.Thread(target=self._status_loop, daemon=True).start()
 
-        _status_timer()
+    def _status_loop(self):
+        """定期状態表示（30秒ごと、受信停止で即座に終了）"""
+        while self.running:
+            self._display_status()
+            if self._stop_event.wait(30.0):
+                break
 
     def shutdown(self):
         """終了処理"""
@@ -398,10 +459,65 @@ class AutoPilotReceiver:
         logger.info("✅ システム終了完了")
 
 # ── RTSP サーバー ────────────────────────────
-def pil_to_gst_buffer(img: Image.Image):
-    data = img.tobytes()
-    buf = Gst.Buffer.new_allocate(None, len(data), None)
-    buf.fill(0, data)
+def check_udp_buffer_limit():
+    """カーネルの UDP 送信バッファ上限が小さい場合に設定方法を案内"""
+    try:
+        with open('/proc/sys/net/core/wmem_max') as f:
+            wmem_max = int(f.read())
+    except (OSError, ValueError):
+        return
+    if wmem_max < RTP_UDP_BUFFER_SIZE:
+        logger.warning(
+            "⚠️ net.core.wmem_max=%d のため RTP 送信バッファが %d バイトに制限されます "
+            "(sudo sysctl -w net.core.wmem_max=1048576 net.core.rmem_max=1048576)",
+            wmem_max, wmem_max
+        )
+
+def create_buffer_pool() -> Gst.BufferPool:
+    """I420フレーム用の固定サイズバッファプールを作成"""
+    caps = Gst.Caps.from_string(
+        f'video/x-raw,format=I420,width={WIDTH},height={HEIGHT},framerate={FPS}/1'
+    )
+    pool = Gst.BufferPool()
+    config = pool.get_config()
+    Gst.BufferPool.config_set_params(config, caps, FRAME_SIZE, BUFFER_POOL_MIN, BUFFER_POOL_MAX)
+    pool.set_config(config)
+    pool.set_active(True)
+    return pool
+
+def rgb_to_i420(rgb: np.ndarray, y_plane: np.ndarray, u_plane: np.ndarray, v_plane: np.ndarray):
+    """RGB（縦横とも偶数の矩形）を BT.601 limited range の I420 に変換して各プレーンへ書き込む"""
+    c = rgb.astype(np.int32)
+    r, g, b = c[..., 0], c[..., 1], c[..., 2]
+    y_plane[...] = ((66*r + 129*g + 25*b + 128) >> 8) + 16
+
+    # 色差は 2x2 画素の平均から求める
+    h, w = r.shape
+    c = (c.reshape(h//2, 2, w//2, 2, 3).sum(axis=(1, 3)) + 2) >> 2
+    r, g, b = c[..., 0], c[..., 1], c[..., 2]
+    u_plane[...] = ((-38*r - 74*g + 112*b + 128) >> 8) + 128
+    v_plane[...] = ((112*r - 94*g - 18*b + 128) >> 8) + 128
+
+def frame_to_gst_buffer(pool: Gst.BufferPool, frame: np.ndarray):
+    # プールのバッファを再利用し、GStreamer のメモリへ直接1回だけコピー
+    # （framebuffer は次フレームで書き換えるため、そのままラップはしない）
+    ret, buf = pool.acquire_buffer(None)
+    if ret != Gst.FlowReturn.OK:
+        return None
+    ok, info = buf.map(Gst.MapFlags.WRITE)
+    if not ok:
+        raise RuntimeError("Gst.Buffer map failed")
+    try:
+        # 書き込み可能な memoryview が得られるのは新しい gst-python オーバーライドのみ
+        data = info.data
+        writable = isinstance(data, memoryview) and not data.readonly
+        if writable:
+            np.copyto(np.frombuffer(data, dtype=np.uint8).reshape(frame.shape), frame)
+    finally:
+        buf.unmap(info)
+    if not writable:
+        # 読み取り専用コピーしか得られない環境では従来どおり fill で書き込む
+        buf.fill(0, frame.tobytes())
     buf.duration = Gst.util_uint64_scale_int(1, Gst.SECOND, FPS)
     return buf
 
@@ -410,41 +526,222 @@ class AutoPilotDisplayFactory(GstRtspServer.RTSPMediaFactory):
         super().__init__()
         self.receiver = receiver
         self.set_shared(True)
+        self.set_buffer_size(RTP_UDP_BUFFER_SIZE)
+        check_udp_buffer_limit()
+
+        # エンコーダー選択（Raspberry Pi のハードウェアエンコーダーを優先）
+        # appsrc から I420 を直接渡すので videoconvert は挟まない
+        if Gst.ElementFactory.find('v4l2h264enc'):
+            encoder_str = (
+                ' ! v4l2h264enc extra-controls="controls,h264_profile=1,video_bitrate=500000,'
+                f'h264_i_frame_period={FPS * KEYFRAME_INTERVAL}" '
+                ' ! video/x-h264,level=(string)4 ! h264parse '
+            )
+            logger.info("🎞️ エンコーダー: v4l2h264enc（ハードウェア）")
+        else:
+            # zerolatency で sliced-threads・Bフレームなしになるため、
+            # 全コアを使うスレッド数とキーフレーム間隔だけ明示する
+            encoder_str = (
+                ' ! x264enc tune=zerolatency bitrate=500 speed-preset=ultrafast '
+                f' threads=0 sliced-threads=true key-int-max={FPS * KEYFRAME_INTERVAL} bframes=0 ref=1 '
+            )
+            logger.info("🎞️ エンコーダー: x264enc（ソフトウェア）")
+
         self.launch_str = (
             '( appsrc name=src is-live=true block=true format=time '
-            f' caps=video/x-raw,format=RGB,width={WIDTH},height={HEIGHT},framerate={FPS}/1 '
-            ' do-timestamp=true ! videoconvert '
-            f'! video/x-raw,format=I420,width={WIDTH},height={HEIGHT},framerate={FPS}/1 '
-            ' ! x264enc tune=zerolatency bitrate=500 speed-preset=ultrafast '
+            f' caps=video/x-raw,format=I420,width={WIDTH},height={HEIGHT},framerate={FPS}/1 '
+            ' do-timestamp=true '
+            f'{encoder_str}'
             ' ! rtph264pay name=pay0 pt=96 config-interval=1 )'
         )
-    
+
+        try:
+            self.font_large = ImageFont.truetype(FONT_PATH, 36)
+            self.font_medium = ImageFont.truetype(FONT_PATH, 28)
+            self.font_small = ImageFont.truetype(FONT_PATH, 20)
+        except IOError:
+            self.font_large = ImageFont.load_default()
+            self.font_medium = ImageFont.load_default()
+            self.font_small = ImageFont.load_default()
+
+        self.background = self._render_background()
+        self.regions = self._build_regions()
+        self._bbox_cache = {}
+        self._tile_cache = {}
+        self._prerender_tiles()
+        # appsrc の need-data / enough-data で生成を制御
+        self._producing = threading.Event()
+        self.pool = create_buffer_pool()
+
+    def _render_background(self) -> np.ndarray:
+        """固定レイアウト（ヘッダー・局番号・IP）を一度だけ描画"""
+        img = Image.new('RGB', (WIDTH, HEIGHT), 'black')
+        draw = ImageDraw.Draw(img)
+
+        # ヘッダー
+        header = "SEC-3000H 自動運転装置"
+        bb_header = draw.textbbox((0,0), header, font=self.font_medium)
+        draw.text(((WIDTH-bb_header[2])//2, 20), header, font=self.font_medium, fill='lightblue')
+
+        # 局番号表示
+        station_text = f"局番号: {self.receiver.station_id}"
+        draw.text((10, 35), station_text, font=self.font_small, fill='gray')
+
+        # IPアドレス表示
+        ip_text = f"IP: {self.receiver.local_ip}"
+        draw.text((10, 60), ip_text, font=self.font_small, fill='gray')
+
+        return np.array(img)
+
+    def _build_regions(self) -> Dict[str, tuple]:
+        """動的項目ごとの再描画矩形 (x0, y0, x1, y1) を算出（I420 の色差に合わせて偶数に揃える）"""
+        def line_height(font) -> int:
+            ascent, descent = font.getmetrics()
+            return (ascent + descent + 1) & ~1
+
+        comm_width = max(
+            (int(self.font_small.getlength(text)) + 2) & ~1
+            for text in ("通信: 正常", "通信: 切断")
+        )
+        return {
+            # 中央寄せの項目は文字幅が変わるため横幅いっぱいを確保
+            'floor': (0, 70, WIDTH, 70 + line_height(self.font_large)),
+            'target': (0, 120, WIDTH, 120 + line_height(self.font_medium)),
+            'load': (0, 160, WIDTH, 160 + line_height(self.font_medium)),
+            'comm': (10, 10, 10 + comm_width, 10 + line_height(self.font_small)),
+            # 日時と最終更新は行が重なるため一つの矩形で扱う
+            'footer': (0, HEIGHT-40, WIDTH, HEIGHT),
+        }
+
+    def _floor_items(self, current_floor) -> tuple:
+        """現在階表示の描画内容"""
+        return ((f"現在階: {current_floor}", self.font_large, 'white', None, 70),)
+
+    def _target_items(self, target_floor) -> tuple:
+        """行先階表示の描画内容"""
+        if target_floor:
+            return ((f"行先階: {target_floor}", self.font_medium, 'yellow', None, 120),)
+        return (("行先階: なし", self.font_medium, 'gray', None, 120),)
+
+    def _prerender_tiles(self):
+        """取り得る値が限られる項目（階表示・通信状態）を起動時に描画しておく"""
+        for floor in FLOOR_LABELS:
+            self._region_tiles('floor', self._floor_items(floor))
+            self._region_tiles('target', self._target_items(floor))
+        self._region_tiles('target', self._target_items(None))
+        for comm_text, comm_color in (("通信: 正常", 'green'), ("通信: 切断", 'red')):
+            self._region_tiles('comm', ((comm_text, self.font_small, comm_color, 10, 10),))
+
+    def _region_tiles(self, name: str, items: tuple):
+        """矩形を背景から描き直した RGB タイルと I420 タイル（同じ内容はキャッシュを再利用）"""
+        key = (name, items)
+        tiles = self._tile_cache.get(key)
+        if tiles is not None:
+            return tiles
+
+        x0, y0, x1, y1 = self.regions[name]
+        tile = Image.fromarray(self.background[y0:y1, x0:x1])
+        draw = ImageDraw.Draw(tile)
+        for text, font, fill, x, y in items:
+            if x is None:
+                x = self._centered_x(draw, text, font)
+            draw.text((x - x0, y - y0), text, font=font, fill=fill)
+        rgb = np.asarray(tile)
+        h, w = rgb.shape[:2]
+        tiles = (
+            rgb,
+            np.empty((h, w), dtype=np.uint8),
+            np.empty((h//2, w//2), dtype=np.uint8),
+            np.empty((h//2, w//2), dtype=np.uint8),
+        )
+        rgb_to_i420(*tiles)
+
+        # 毎秒変わる日時は再利用されないのでキャッシュしない
+        if name != 'footer':
+            if len(self._tile_cache) >= TILE_CACHE_SIZE:
+                self._tile_cache.clear()
+            self._tile_cache[key] = tiles
+        return tiles
+
+    def _redraw_region(self, frame: np.ndarray, planes, name: str, items: tuple):
+        """矩形の RGB と I420 プレーンを描画済みタイルで差し替える"""
+        x0, y0, x1, y1 = self.regions[name]
+        rgb, y_tile, u_tile, v_tile = self._region_tiles(name, items)
+        y_plane, u_plane, v_plane = planes
+        frame[y0:y1, x0:x1] = rgb
+        y_plane[y0:y1, x0:x1] = y_tile
+        u_plane[y0//2:y1//2, x0//2:x1//2] = u_tile
+        v_plane[y0//2:y1//2, x0//2:x1//2] = v_tile
+
+    def _centered_x(self, draw, text, font) -> int:
+        """中央寄せの描画開始X座標（同じ文字列は測り直さない）"""
+        key = (text, id(font))
+        x = self._bbox_cache.get(key)
+        if x is None:
+            bb = draw.textbbox((0,0), text, font=font)
+            x = (WIDTH-bb[2])//2
+            if len(self._bbox_cache) >= BBOX_CACHE_SIZE:
+                self._bbox_cache.clear()
+            self._bbox_cache[key] = x
+        return x
+
     def do_create_element(self, url):
         pipeline = Gst.parse_launch(self.launch_str)
         self.appsrc = pipeline.get_by_name('src')
-        threading.Thread(target=self.push_frames, daemon=True).start()
+        self.appsrc.set_property('max-bytes', FRAME_SIZE * 2)
+        self.appsrc.connect('need-data', self._on_need_data)
+        self.appsrc.connect('enough-data', self._on_enough_data)
+        threading.Thread(target=self.push_frames, args=(self.appsrc,), daemon=True).start()
         return pipeline
-    
-    def push_frames(self):
-        try:
-            font_large = ImageFont.truetype(FONT_PATH, 36)
-            font_medium = ImageFont.truetype(FONT_PATH, 28)
-            font_small = ImageFont.truetype(FONT_PATH, 20)
-        except IOError:
-            font_large = ImageFont.load_default()
-            font_medium = ImageFont.load_default()
-            font_small = ImageFont.load_default()
-        
-        while True:
-            img = Image.new('RGB', (WIDTH, HEIGHT), 'black')
-            draw = ImageDraw.Draw(img)
-            
-            with self.receiver.lock:
-                current_floor = self.receiver.status.current_floor
-                target_floor = self.receiver.status.target_floor
-                load_weight = self.receiver.status.load_weight
-                last_update = self.receiver.status.last_update
-                communication_active = self.receiver.status.communication_active
+
+    def _on_need_data(self, src, length):
+        """appsrc がデータを要求（生成再開）"""
+        self._producing.set()
+
+    def _on_enough_data(self, src):
+        """appsrc のキューが満杯（生成一時停止）"""
+        self._producing.clear()
+
+    def push_frames(self, appsrc):
+        """フレーム生成・配信（パイプラインが作り直されたら終了）"""
+        font_medium = self.font_medium
+        font_small = self.font_small
+
+        # 描画は RGB の framebuffer、送信は I420（矩形単位で変換）
+        frame = self.background.copy()
+        i420 = np.empty(FRAME_SIZE, dtype=np.uint8)
+        y_size = WIDTH * HEIGHT
+        planes = (
+            i420[:y_size].reshape(HEIGHT, WIDTH),
+            i420[y_size:y_size * 5 // 4].reshape(HEIGHT // 2, WIDTH // 2),
+            i420[y_size * 5 // 4:].reshape(HEIGHT // 2, WIDTH // 2),
+        )
+        rgb_to_i420(frame, *planes)
+        drawn = {}
+        last_key = None
+        last_keyframe = None
+        clock_sec = None
+        clock_text = ""
+
+        while appsrc is self.appsrc:
+            # エンコーダー側が要求するまで待機（過剰生成を防止）
+            if not self._producing.wait(timeout=0.5):
+                continue
+
+            (version, current_floor, target_floor, load_weight,
+             last_update, communication_active) = self.receiver.status_snapshot
+
+            # 状態も時計（秒）も変わっていなければ描画・送信を省略
+            # エンコーダーのキーフレーム間隔はフレーム数なので、送信が間引かれる間は
+            # KEYFRAME_INTERVAL ごとにキーフレームを要求して途中参加でもすぐ映るようにする
+            now_sec = int(time.time())
+            key = (version, now_sec)
+            now = time.monotonic()
+            force_keyframe = last_keyframe is None or now - last_keyframe >= KEYFRAME_INTERVAL
+            if key == last_key and not force_keyframe:
+                time.sleep(1.0/FPS)
+                continue
+            last_key = key
 
             # 通信状態チェック
             if last_update:
@@ -453,31 +750,8 @@ class AutoPilotDisplayFactory(GstRtspServer.RTSPMediaFactory):
             else:
                 comm_active = False
 
-            # ヘッダー
-            header = "SEC-3000H 自動運転装置"
-            bb_header = draw.textbbox((0,0), header, font=font_medium)
-            draw.text(((WIDTH-bb_header[2])//2, 20), header, font=font_medium, fill='lightblue')
-
-            # 現在階表示
-            floor_text = f"現在階: {current_floor}"
-            bb_floor = draw.textbbox((0,0), floor_text, font=font_large)
-            draw.text(((WIDTH-bb_floor[2])//2, 70), floor_text, font=font_large, fill='white')
-
-            # 行先階表示
-            if target_floor:
-                target_text = f"行先階: {target_floor}"
-                color = 'yellow'
-            else:
-                target_text = "行先階: なし"
-                color = 'gray'
-            
-            bb_target = draw.textbbox((0,0), target_text, font=font_medium)
-            draw.text(((WIDTH-bb_target[2])//2, 120), target_text, font=font_medium, fill=color)
-
             # 荷重表示
             load_text = f"荷重: {load_weight}kg"
-            bb_load = draw.textbbox((0,0), load_text, font=font_medium)
-            draw.text(((WIDTH-bb_load[2])//2, 160), load_text, font=font_medium, fill='lightgreen')
 
             # 通信状態表示
             if comm_active:
@@ -486,32 +760,43 @@ class AutoPilotDisplayFactory(GstRtspServer.RTSPMediaFactory):
             else:
                 comm_text = "通信: 切断"
                 comm_color = 'red'
-            
-            draw.text((10, 10), comm_text, font=font_small, fill=comm_color)
 
-            # 局番号表示
-            station_text = f"局番号: {self.receiver.station_id}"
-            draw.text((10, 35), station_text, font=font_small, fill='gray')
-
-            # IPアドレス表示
-            ip_text = f"IP: {self.receiver.local_ip}"
-            draw.text((10, 60), ip_text, font=font_small, fill='gray')
-
-            # 日時表示
-            now = datetime.now().strftime("%Y年%-m月%-d日 %H:%M:%S")
-            bb_time = draw.textbbox((0,0), now, font=font_small)
-            draw.text(((WIDTH-bb_time[2])//2, HEIGHT-40), now, font=font_small, fill='gray')
-
-            # 最終更新時刻
+            # 日時表示・最終更新時刻
+            if now_sec != clock_sec:
+                clock_text = time.strftime("%Y年%-m月%-d日 %H:%M:%S", time.localtime(now_sec))
+                clock_sec = now_sec
+            footer = ((clock_text, font_small, 'gray', None, HEIGHT-40),)
             if last_update:
                 update_text = f"最終更新: {last_update.strftime('%H:%M:%S')}"
-                bb_update = draw.textbbox((0,0), update_text, font=font_small)
-                draw.text(((WIDTH-bb_update[2])//2, HEIGHT-20), update_text, font=font_small, fill='gray')
+                footer += ((update_text, font_small, 'gray', None, HEIGHT-20),)
+
+            fields = {
+                # 現在階・行先階表示（主な値は起動時に描画済み）
+                'floor': self._floor_items(current_floor),
+                'target': self._target_items(target_floor),
+                'load': ((load_text, font_medium, 'lightgreen', None, 160),),
+                'comm': ((comm_text, font_small, comm_color, 10, 10),),
+                'footer': footer,
+            }
+
+            # 変化した項目の矩形だけを描き直す
+            for name, items in fields.items():
+                if drawn.get(name) != items:
+                    self._redraw_region(frame, planes, name, items)
+                    drawn[name] = items
 
             # フレーム送信
-            buf = pil_to_gst_buffer(img)
-            if self.appsrc.emit('push-buffer', buf) != Gst.FlowReturn.OK:
-                break
+            if force_keyframe:
+                appsrc.send_event(GstVideo.video_event_new_downstream_force_key_unit(
+                    Gst.CLOCK_TIME_NONE, Gst.CLOCK_TIME_NONE, Gst.CLOCK_TIME_NONE, True, 0))
+                last_keyframe = now
+            buf = frame_to_gst_buffer(self.pool, i420)
+            ret = appsrc.emit('push-buffer', buf) if buf is not None else Gst.FlowReturn.ERROR
+            if ret != Gst.FlowReturn.OK:
+                # 停止中（FLUSHING 等）は次の need-data まで待ち、スレッドは終了させない
+                logger.warning("⚠️ フレームバッファ送信失敗: %s", ret)
+                self._producing.clear()
+                last_key = None
             time.sleep(1.0/FPS)
 
 # ── メイン処理 ─────────────────────────────────
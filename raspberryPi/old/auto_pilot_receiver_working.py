@@ -7,12 +7,16 @@ SEC-3000H Auto Pilot Receiver (Working Version)
 """
 
 import serial
+import array
+import fcntl
+import termios
 import time
 import threading
 import logging
 import signal
 import sys
 import socket
+import struct
 from datetime import datetime
 from typing import Optional, Dict, Any
 from enum import IntEnum
@@ -27,9 +31,29 @@ SERIAL_CONFIG = {
     'bytesize': serial.EIGHTBITS,
     'parity': serial.PARITY_EVEN,
     'stopbits': serial.STOPBITS_ONE,
-    'timeout': 1
+    'timeout': 0.5  # 受信スレッドが停止要求を確認する間隔
 }
 
+# serial_struct.flags の ASYNC_LOW_LATENCY（linux/tty_flags.h）
+ASYNC_LOW_LATENCY = 0x2000
+SERIAL_STRUCT_FLAGS_INDEX = 4  # int type, line, port, irq, flags の順
+
+# ENQ(1) 局番号(4) CMD(1) データ番号(4) データ値(4) チェックサム(2) の固定長フレーム
+_FRAME = struct.Struct('>B4sc4s4s2s')
+
+# ── ログ用時刻 ─────────────────────────────────
+_timestamp_cache = (0, "")  # (整数秒, 整形済み文字列)：1タプルで差し替えるのでスレッド間でも不整合にならない
+
+def _now_timestamp() -> str:
+    """現在時刻を「YYYY年MM月DD日 HH:MM:SS」で返す（同じ秒の間は整形済み文字列を再利用）"""
+    global _timestamp_cache
+    sec = int(time.time())
+    cached_sec, cached_str = _timestamp_cache
+    if sec != cached_sec:
+        cached_str = time.strftime("%Y年%m月%d日 %H:%M:%S", time.localtime(sec))
+        _timestamp_cache = (sec, cached_str)
+    return cached_str
+
 # ── ログ設定 ─────────────────────────────────
 logging.basicConfig(
     level=logging.INFO,
@@ -67,7 +91,10 @@ class AutoPilotReceiver:
         self.serial_conn: Optional[serial.Serial] = None
         self.status = ElevatorStatus()
         self.station_id = "0001"  # 自動運転装置側局番号
+        self._station_id_bytes = self.station_id.encode('ascii')
         self.elevator_station = "0002"  # エレベーター側局番号
+        self._ack_frame = b'\x06' + self.elevator_station.encode('ascii')  # ACK + 0002
+        self._ack_hex = self._ack_frame.hex().upper()
         self.running = False
         self.lock = threading.Lock()
         self.local_ip = self._get_local_ip()
@@ -103,91 +130,96 @@ class AutoPilotReceiver:
         try:
             self.serial_conn = serial.Serial(**SERIAL_CONFIG)
             logger.info(f"✅ シリアルポート {SERIAL_PORT} 接続成功")
+            self._set_low_latency()
             
         except Exception as e:
             logger.error(f"❌ シリアルポートエラー: {e}")
             raise
 
+    def _set_low_latency(self):
+        """ドライバに ASYNC_LOW_LATENCY を設定（USBシリアルの16ms まとめ待ちを解消）"""
+        try:
+            fd = self.serial_conn.fileno()
+            buf = array.array('i', [0] * 32)  # struct serial_struct より大きく確保
+            fcntl.ioctl(fd, termios.TIOCGSERIAL, buf)
+            buf[SERIAL_STRUCT_FLAGS_INDEX] |= ASYNC_LOW_LATENCY
+            fcntl.ioctl(fd, termios.TIOCSSERIAL, buf)
+            logger.info("⚡ ASYNC_LOW_LATENCY を設定しました")
+        except (OSError, AttributeError) as e:
+            # 対応していないドライバ（pty等）・権限不足の場合はそのまま続行
+            logger.warning(f"⚠️ ASYNC_LOW_LATENCY を設定できません: {e}")
+
     def _listen_serial(self):
-        """シリアル受信処理（エレベーターからのデータ受信）"""
-        buffer = bytearray()
-        
-        while self.running and self.serial_conn and self.serial_conn.is_open:
+        """シリアル受信処理（エレベーターからのデータ受信）
+
+        ENQ(05H) まで読み進め、続く15バイトをまとめて読むだけの状態機械。
+        1メッセージあたり2回の読み出しで済み、バッファの検索・詰め直しは行わない。
+        """
+        serial_conn = self.serial_conn
+        body_size = _FRAME.size - 1
+
+        while self.running and serial_conn and serial_conn.is_open:
             try:
-                if self.serial_conn.in_waiting > 0:
-                    data = self.serial_conn.read(self.serial_conn.in_waiting)
-                    if data:
-                        # デバッグログ
-                        hex_data = data.hex().upper()
-                        logger.info(f"🔍 受信データ: {hex_data} ({len(data)}バイト)")
-                        buffer.extend(data)
-                    
-                    # ENQ(05H)で始まるメッセージを検索
-                    while len(buffer) >= 16:
-                        enq_pos = buffer.find(0x05)
-                        if enq_pos == -1:
-                            # ENQが見つからない場合、バッファをクリア
-                            if len(buffer) > 0:
-                                logger.warning(f"⚠️ ENQなしデータ破棄: {buffer.hex().upper()}")
-                            buffer.clear()
-                            break
-                        
-                        if enq_pos > 0:
-                            # ENQ前のデータを破棄
-                            discarded = buffer[:enq_pos]
-                            logger.warning(f"⚠️ ENQ前データ破棄: {discarded.hex().upper()}")
-                            buffer = buffer[enq_pos:]
-                        
-                        if len(buffer) >= 16:
-                            message = buffer[:16]
-                            buffer = buffer[16:]
-                            # デバッグログ
-                            hex_msg = message.hex().upper()
-                            logger.info(f"📦 メッセージ処理: {hex_msg}")
-                            self._handle_received_data(message)
-                        else:
-                            break
-                
-                time.sleep(0.05)
+                # ENQ が届くまでブロック（timeout ごとに停止要求を確認）
+                head = serial_conn.read_until(b'\x05')
+                if not head:
+                    continue
+                if head[-1] != 0x05:
+                    # timeout までに ENQ が来なかった
+                    logger.warning("⚠️ ENQなしデータ破棄: %s", head.hex().upper())
+                    continue
+                if len(head) > 1:
+                    # ENQ前のデータを破棄
+                    logger.warning("⚠️ ENQ前データ破棄: %s", head[:-1].hex().upper())
+
+                body = serial_conn.read(body_size)
+                if len(body) < body_size:
+                    logger.warning("⚠️ 不完全メッセージ破棄: 05%s", body.hex().upper())
+                    continue
+
+                message = b'\x05' + body
+                # デバッグログ
+                if logger.isEnabledFor(logging.INFO):
+                    logger.info("📦 メッセージ処理: %s", message.hex().upper())
+                self._handle_received_data(message)
                 
             except Exception as e:
-                logger.error(f"❌ シリアル受信エラー: {e}")
+                logger.error("❌ シリアル受信エラー: %s", e)
                 break
 
     def _handle_received_data(self, data: bytes):
         """受信データ処理（エレベーターからの状態データ）"""
         try:
-            if len(data) < 16 or data[0] != 0x05:
-                logger.warning(f"⚠️ 無効なメッセージ: {data.hex().upper()}")
+            if len(data) < _FRAME.size or data[0] != 0x05:
+                logger.warning("⚠️ 無効なメッセージ: %s", data.hex().upper())
                 return
 
-            # メッセージ解析
-            try:
-                station = data[1:5].decode('ascii')
-                command = chr(data[5])
-                data_num_str = data[6:10].decode('ascii')
-                data_value_str = data[10:14].decode('ascii')
-                checksum = data[14:16].decode('ascii')
-            except UnicodeDecodeError as e:
-                logger.error(f"❌ デコードエラー: {e}, データ: {data.hex().upper()}")
-                return
+            # メッセージ解析（各フィールドは bytes のまま扱い、文字列化はログ出力時のみ）
+            _, station, command, data_num_hex, data_value_hex, checksum_hex = _FRAME.unpack_from(data)
+            log_info = logger.isEnabledFor(logging.INFO)
 
-            logger.info(f"🔍 解析結果: 局番号={station}, CMD={command}, データ番号={data_num_str}, データ値={data_value_str}, チェックサム={checksum}")
+            if log_info:
+                logger.info(
+                    "🔍 解析結果: 局番号=%s, CMD=%s, データ番号=%s, データ値=%s, チェックサム=%s",
+                    station.decode('ascii', 'replace'), command.decode('ascii', 'replace'),
+                    data_num_hex.decode('ascii', 'replace'), data_value_hex.decode('ascii', 'replace'),
+                    checksum_hex.decode('ascii', 'replace')
+                )
 
             # 自分宛のメッセージかチェック
-            if station != self.station_id:
-                logger.info(f"ℹ️ 他局宛メッセージ: {station} (自分: {self.station_id})")
+            if station != self._station_id_bytes:
+                if log_info:
+                    logger.info("ℹ️ 他局宛メッセージ: %s (自分: %s)",
+                                station.decode('ascii', 'replace'), self.station_id)
                 return
 
             try:
-                data_num = int(data_num_str, 16)
-                data_value = int(data_value_str, 16)
+                data_num = int(data_num_hex, 16)
+                data_value = int(data_value_hex, 16)
             except ValueError as e:
-                logger.error(f"❌ 数値変換エラー: {e}, データ番号={data_num_str}, データ値={data_value_str}")
+                logger.error("❌ 数値変換エラー: %s, データ番号=%r, データ値=%r", e, data_num_hex, data_value_hex)
                 return
 
-            timestamp = datetime.now().strftime("%Y年%m月%d日 %H:%M:%S")
-
             # データ処理
             with self.lock:
                 self.status.last_update = datetime.now()
@@ -216,16 +248,18 @@ class AutoPilotReceiver:
                 else:
                     description = f"データ番号: {data_num:04X}"
 
-            logger.info(
-                f"[{timestamp}] 📨 受信: ENQ(05) 局番号:{self.elevator_station} CMD:{command} "
-                f"{description} データ:{data_value_str} チェックサム:{checksum}"
-            )
+            if log_info:
+                logger.info(
+                    "[%s] 📨 受信: ENQ(05) 局番号:%s CMD:%s %s データ:%s チェックサム:%s",
+                    _now_timestamp(), self.elevator_station, command.decode('ascii', 'replace'),
+                    description, data_value_hex.decode('ascii'), checksum_hex.decode('ascii', 'replace')
+                )
 
             # ACK応答送信
             self._send_ack_response()
 
         except Exception as e:
-            logger.error(f"❌ 受信データ処理エラー: {e}, データ: {data.hex().upper()}")
+            logger.error("❌ 受信データ処理エラー: %s, データ: %s", e, data.hex().upper())
 
     def _send_ack_response(self):
         """ACK応答送信"""
@@ -233,17 +267,13 @@ class AutoPilotReceiver:
             return
 
         try:
-            response = bytearray([0x06])  # ACK
-            response.extend(self.elevator_station.encode('ascii'))  # 0002
-
-            self.serial_conn.write(response)
+            self.serial_conn.write(self._ack_frame)
 
-            timestamp = datetime.now().strftime("%Y年%m月%d日 %H:%M:%S")
-            hex_data = response.hex().upper()
-            logger.info(f"[{timestamp}] 📤 ACK送信: {hex_data}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("[%s] 📤 ACK送信: %s", _now_timestamp(), self._ack_hex)
 
         except Exception as e:
-            logger.error(f"❌ ACK送信エラー: {e}")
+            logger.error("❌ ACK送信エラー: %s", e)
 
     def start_receiver(self):
         """受信開始"""
@@ -265,7 +295,10 @@ class AutoPilotReceiver:
 
     def _display_status(self):
         """状態表示"""
-        timestamp = datetime.now().strftime("%Y年%m月%d日 %H:%M:%S")
+        if not logger.isEnabledFor(logging.INFO):
+            return
+
+        timestamp = _now_timestamp()
 
         with self.lock:
             current_floor = self.status.current_floor
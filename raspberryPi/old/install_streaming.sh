@@ -20,6 +20,8 @@ sudo apt install -y \
     git \
     libopencv-dev \
     python3-opencv \
+    python3-gst-1.0 \
+    gir1.2-gst-plugins-base-1.0 \
     gstreamer1.0-tools \
     gstreamer1.0-plugins-base \
     gstreamer1.0-plugins-good \
@@ -88,6 +90,14 @@ echo "🔄 systemdサービスを有効化中..."
 sudo systemctl daemon-reload
 sudo systemctl enable elevator-display.service
 
+# UDPソケットバッファ上限を拡張（RTP送信バッファが 212992 バイトに制限される警告を回避）
+echo "📡 UDPソケットバッファ上限を設定中..."
+sudo tee /etc/sysctl.d/99-elevator-rtsp.conf > /dev/null <<EOF
+net.core.rmem_max=1048576
+net.core.wmem_max=1048576
+EOF
+sudo sysctl -p /etc/sysctl.d/99-elevator-rtsp.conf
+
 # ファイアウォール設定（RTSPポート8554を開放）
 echo "🔥 ファイアウォール設定中..."
 if command -v ufw &> /dev/null; then